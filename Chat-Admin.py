@@ -2,14 +2,16 @@ from flask import Flask, jsonify, request
 import mysql.connector
 from mysql.connector import Error, pooling
 import json
-import re
+import sqlite3
 from flask_cors import CORS
 from langchain_ollama import OllamaLLM
+from model_loader import get_model, start_warmup, readiness
 from langchain_core.prompts import ChatPromptTemplate
 import copy
-from step import final_func
+from step import final_func, final_func_stats
 from datetime import datetime
-from docx import Document
+from order_export import export_orders, export_lock
+from data_providers import new_context, provide, log_context, provider_stats
 app = Flask(__name__)
 CORS(app)
 
@@ -24,7 +26,7 @@ DB_CONFIG = {
 connection_pool = None
 
 # Load LLM Model
-model = OllamaLLM(model="llama3.1")
+model = get_model("llama3.1")
 
 def create_connection_pool():
     """Creates a MySQL connection pool."""
@@ -76,71 +78,218 @@ def fetch_products():
 
 
 
-def fetch_orders():
-    """Fetch orders from the database with billing, shipping, and product details."""
+# Orders fetched per keyset page
+ORDER_PAGE_SIZE = 500
+
+# High-water mark of the last order label export: {"updated_at": ..., "order_id": ...}
+ORDER_WATERMARK_FILE = "order_export_state.json"
+
+# Ids of every order that already got a label. The incremental pass follows
+# date_updated_gmt rather than date_created_gmt, because an order only becomes
+# exportable when its status changes (e.g. wc-on-hold -> wc-processing after a
+# bank transfer clears), possibly long after newer orders were exported. Any
+# edit also bumps date_updated_gmt, so already-labelled ids are skipped here.
+ORDER_EXPORT_DB = "order_exports.db"
+
+# Starting mark for the very first export, so it also walks oldest first and
+# the mark can advance after every saved document part
+ORDER_EXPORT_EPOCH = {"updated_at": "1970-01-01 00:00:00", "order_id": 0}
+
+ORDER_STATUSES = ('wc-completed', 'wc-processing', 'wc-pending')
+
+# Addresses and names come from indexed (order_id, meta_key) lookups instead
+# of pivoting every meta row of every order; products from the order items index.
+ORDERS_PAGE_QUERY = """
+SELECT 
+    o.id AS order_id,
+    o.date_created_gmt AS order_date,
+    o.date_updated_gmt AS updated_at,
+    o.status AS order_status,
+
+    -- Billing Information
+    bfn.meta_value AS billing_first_name,
+    bln.meta_value AS billing_last_name,
+    bai.meta_value AS billing_address,
+
+    -- Shipping Information
+    sai.meta_value AS shipping_address,
+
+    -- Contact Information
+    o.billing_email AS billing_email,
+    o.total_amount AS order_total,
+
+    -- Products Ordered
+    (SELECT GROUP_CONCAT(DISTINCT oi.order_item_name)
+     FROM wpuz_woocommerce_order_items oi
+     WHERE oi.order_id = o.id AND oi.order_item_type = 'line_item') AS products_ordered
+
+FROM 
+    wpuz_wc_orders o
+LEFT JOIN wpuz_wc_orders_meta bfn ON bfn.order_id = o.id AND bfn.meta_key = '_billing_first_name'
+LEFT JOIN wpuz_wc_orders_meta bln ON bln.order_id = o.id AND bln.meta_key = '_billing_last_name'
+LEFT JOIN wpuz_wc_orders_meta bai ON bai.order_id = o.id AND bai.meta_key = '_billing_address_index'
+LEFT JOIN wpuz_wc_orders_meta sai ON sai.order_id = o.id AND sai.meta_key = '_shipping_address_index'
+
+WHERE 
+    o.status IN (%s, %s, %s)
+    {keyset}
+
+ORDER BY 
+    o.date_updated_gmt {direction}, o.id {direction}
+LIMIT %s;
+"""
+
+
+def iter_order_pages(page_size=ORDER_PAGE_SIZE, since=None):
+    """Yields pages of orders, keyset-paginated by (date_updated_gmt, id).
+
+    Without `since` the whole history is returned most recently updated first;
+    with a high-water mark only orders updated after it are returned, oldest
+    first. An order whose status only just became exportable is therefore
+    picked up even if it was created before the mark.
+    """
     if connection_pool is None:
-        return {"error": "No active database connection pool."}, 500
+        raise Error("No active database connection pool.")
+
+    direction = "ASC" if since else "DESC"
+    comparison = ">" if since else "<"
+    cursor_key = (since["updated_at"], since["order_id"]) if since else None
+
+    while True:
+        keyset = ""
+        params = list(ORDER_STATUSES)
+        if cursor_key is not None:
+            keyset = (f"AND (o.date_updated_gmt {comparison} %s "
+                      f"OR (o.date_updated_gmt = %s AND o.id {comparison} %s))")
+            params += [cursor_key[0], cursor_key[0], cursor_key[1]]
+        params.append(page_size)
+
+        connection = connection_pool.get_connection()
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(ORDERS_PAGE_QUERY.format(keyset=keyset, direction=direction), params)
+            page = cursor.fetchall()
+        finally:
+            cursor.close()
+            connection.close()  # Return connection to the pool between pages
+
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        cursor_key = (page[-1]["updated_at"], page[-1]["order_id"])
+
+
+def load_order_watermark():
+    """Returns the newest (updated_at, order_id) already exported, or None."""
+    try:
+        with open(ORDER_WATERMARK_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-    connection = connection_pool.get_connection()
-    cursor = connection.cursor(dictionary=True)
-    
+
+def save_order_watermark(orders):
+    """Persists the most recently updated exported order as the high-water mark."""
+    newest = max(orders, key=lambda order: (order["updated_at"], order["order_id"]))
+    updated_at = newest["updated_at"]
+    with open(ORDER_WATERMARK_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "updated_at": updated_at.strftime("%Y-%m-%d %H:%M:%S") if isinstance(updated_at, datetime) else str(updated_at),
+            "order_id": newest["order_id"]
+        }, f)
+
+
+def _order_export_db():
+    conn = sqlite3.connect(ORDER_EXPORT_DB)
+    conn.execute("CREATE TABLE IF NOT EXISTS exported_orders (order_id INTEGER PRIMARY KEY, exported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    return conn
+
+
+def skip_exported_orders(pages):
+    """Drops the orders of each page that already have a label."""
+    conn = _order_export_db()
     try:
-        query = """
-        SELECT 
-            o.id AS order_id,
-            o.date_created_gmt AS order_date,
-            o.status AS order_status,
+        for page in pages:
+            ids = [order["order_id"] for order in page]
+            placeholders = ",".join("?" * len(ids))
+            exported = {row[0] for row in conn.execute(
+                f"SELECT order_id FROM exported_orders WHERE order_id IN ({placeholders})", ids)}
+            fresh = [order for order in page if order["order_id"] not in exported]
+            if fresh:
+                yield fresh
+    finally:
+        conn.close()
 
-            -- Billing Information
-            MAX(CASE WHEN om.meta_key = '_billing_first_name' THEN om.meta_value END) AS billing_first_name,
-            MAX(CASE WHEN om.meta_key = '_billing_last_name' THEN om.meta_value END) AS billing_last_name,
-            MAX(CASE WHEN om.meta_key = '_billing_address_index' THEN om.meta_value END) AS billing_address,
 
-            -- Shipping Information
-            MAX(CASE WHEN om.meta_key = '_shipping_address_index' THEN om.meta_value END) AS shipping_address,
+def record_exported_orders(orders):
+    """Marks a saved part's orders as labelled, then advances the high-water mark."""
+    conn = _order_export_db()
+    try:
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO exported_orders (order_id) VALUES (?)",
+                             ((order["order_id"],) for order in orders))
+    finally:
+        conn.close()
+    save_order_watermark(orders)
 
-            -- Contact Information
-            o.billing_email AS billing_email,
-            o.total_amount AS order_total,
 
-            -- Products Ordered
-            GROUP_CONCAT(DISTINCT oi.order_item_name) AS products_ordered
+# Ad placement prompt template
+AD_PROMPT_TEMPLATE = """
+    Given the following product data, present it in a clear and user-friendly format with a starting message "Here is our Analysis for your direction".
 
-        FROM 
-            wpuz_wc_orders o
-        LEFT JOIN 
-            wpuz_wc_orders_meta om ON o.id = om.order_id
-        LEFT JOIN 
-            wpuz_woocommerce_order_items oi ON o.id = oi.order_id AND oi.order_item_type = 'line_item'
+    {context}
 
-        WHERE 
-            o.status IN ('wc-completed', 'wc-processing', 'wc-pending')
+    Instructions:
+    - Only give shoes data. No extra explanation
+    - Make sure if the user has specified a number e.g 1,2,3,4 then only give that many shoes in descending order.
+    - If the user asks for the top X products, sort them by Trend Score in descending order and display only the top X.
+    - If no number is specified, display all products in an organized manner.
+    - Show product details in an easy-to-read format with clear labels.
 
-        GROUP BY 
-            o.id, o.date_created_gmt, o.status, o.billing_email, o.total_amount
+    Example format:
 
-        ORDER BY 
-            o.date_created_gmt DESC;
-        """
-        
-        cursor.execute(query)
-        orders = cursor.fetchall()
-        return orders, 200
+    **Top Trending Products**
+    1️⃣ **Product Name:** <Product Name>
+    - 🏷 **Brand:** <Brand>
+    - 📂 **Category:** <Category>
+    - 📊 **Trend Score:** <Trend Score>
 
-    except Error as e:
-        return {"error": str(e)}, 400
+    Answer the question: {question}
+    """
 
-    finally:
-        cursor.close()
-        connection.close()  # Return connection to the pool
+# Keyword routing for admin queries
+ORDER_LABELLING_KEYWORDS = ["orders", "summary", "labelling", "labels", "order", "processing"]
+AD_PLACEMENT_KEYWORDS = ["products", "shoes", "top shoes", "top selling", "ad", "placement", "top"]
+
+ORDER_LABELS_RESPONSE = "✅ Your Order Labels Have Been Fetched! 🏷️📦\n📄 Check your order document to view the details. 🚀"
+UNKNOWN_INTENT_RESPONSE = "Please ask about top products / ad placement, or about order labels."
+NO_NEW_ORDERS_RESPONSE = "✅ No new orders since the last label export. 📦"
+ORDER_FETCH_ERROR_RESPONSE = "Error: Unable to fetch orders. Please try again."
+ORDER_EXPORT_ERROR_RESPONSE = "Error: Unable to save the order labels. Please try again."
+
+
+def classify_admin_query(query_text):
+    """Routes an admin query to "ad_placement", "order_labelling" or None by keyword."""
+    query_text = query_text.lower()
+    if any(keyword in query_text for keyword in AD_PLACEMENT_KEYWORDS):
+        return "ad_placement"
+    if any(keyword in query_text for keyword in ORDER_LABELLING_KEYWORDS):
+        return "order_labelling"
+    return None
+
+
+def build_admin_prompt(query_text, data, query_context):
+    """Formats an admin prompt template with the data and question."""
+    prompt_template = ChatPromptTemplate.from_template(query_context)
+    return prompt_template.format(context=data, question=query_text)
 
 
 def generate_admin_response(query_text, data, query_context):
     
 
     # Format the prompt
-    prompt_template = ChatPromptTemplate.from_template(query_context)
-    prompt = prompt_template.format(context=data, question=query_text)
+    prompt = build_admin_prompt(query_text, data, query_context)
 
     try:
         response = model(prompt)
@@ -149,46 +298,55 @@ def generate_admin_response(query_text, data, query_context):
         print(f"❌ Error generating response: {e}")
         return "Error: Unable to process the request. Please try again."
 
-def format_order(order):
-    # Extract contact number using regex (improved pattern)
-    contact_match = re.findall(r'(\+?\d{10,15})', order["billing_address"])
-    contact = contact_match[-1] if contact_match else "N/A"  # Pick last match as number usually appears last
 
-    # Format order date safely
-    formatted_date = order["order_date"].strftime("%d %b %Y, %I:%M %p") if order.get("order_date") else "Unknown Date"
-
-    return (f"📅 Order Date: {formatted_date}\n"
-            f"📦 Order #{order['order_id']}\n"
-            f"📍 Shipping Address:\n{order['shipping_address']}\n"
-            f"🎁 Product: {order['products_ordered']}\n"
-            f"💰 Total: {float(order['order_total']):,.0f} PKR\n"
-            f"📧 Email: {order['billing_email']}\n"
-            f"📞 Contact: {contact}\n"
-            f"🚚 Status: Processing\n")
+def iter_new_order_pages():
+    """Pages of orders updated since the high-water mark that have no label yet.
 
+    A generator, so the watermark is only read on first iteration, i.e. inside
+    the export lock rather than when the data provider hands it out.
+    """
+    since = load_order_watermark() or ORDER_EXPORT_EPOCH
+    yield from skip_exported_orders(iter_order_pages(since=since))
 
 
+def export_order_labels(pages=None):
+    """Streams new order pages (default: iter_new_order_pages()) into today's label document.
 
+    Pages go straight from MySQL into the dated export (rolling to a new part
+    every ORDERS_PER_FILE orders). After each saved part its order ids are
+    recorded and the high-water mark advances, so a failure part-way never
+    re-exports or skips orders, and an order that reaches an exportable
+    status late is still labelled once. The whole cycle holds export_lock, so
+    concurrent requests (threads or processes) run one after the other.
+    """
+    if pages is None:
+        pages = iter_new_order_pages()
+    try:
+        with export_lock():
+            stats = export_orders(pages, on_saved=record_exported_orders)
+    except Error as e:
+        print(f"❌ Error fetching orders: {e}")
+        return ORDER_FETCH_ERROR_RESPONSE
+    except (OSError, sqlite3.Error) as e:
+        # Saving the document or recording the exported orders failed; parts saved
+        # before the failure are already recorded, so a retry resumes after them
+        print(f"❌ Error exporting order labels: {e}")
+        return ORDER_EXPORT_ERROR_RESPONSE
+    if not stats["orders"]:
+        return NO_NEW_ORDERS_RESPONSE
+    
+    return (f"{ORDER_LABELS_RESPONSE}\n🗂️ {stats['orders']} new orders in {', '.join(stats['files'])} "
+            f"({stats['rows_per_sec']:,.0f} rows/sec)")
 
-from docx import Document
 
-def save_orders_to_word(file_path, orders):
-    """ Saves the formatted order list to a Word document and overwrites the previous content. """
-    
-    # Ensure orders is a list of dictionaries
-    if isinstance(orders, tuple):
-        orders = orders[0]  
-    
-    # Format the orders into a string
-    response = "Order Dispatch List\n\n" + "\n".join(format_order(order) for order in orders)
-    
-    # Create a new Word document (overwriting existing file)
-    doc = Document()
-    doc.add_paragraph(response)
-    
-    # Save the document at the specified path
-    doc.save(file_path)
-    print(f"Orders successfully saved to {file_path}")
+# Data an admin request can load. Each provider is evaluated lazily, at most
+# once per request, and only by the intent that needs it. Actions on that
+# data (like writing label documents) happen in the intent's branch; time
+# spent fetching pages while they are consumed is charged to the provider.
+ADMIN_DATA_PROVIDERS = {
+    "trend_report": final_func,              # trend analysis over final.json + catalog; memoized across requests too
+    "new_order_pages": iter_new_order_pages  # lazy page stream of orders still needing a label
+}
 
 # In the main function:
 
@@ -207,59 +365,41 @@ def admin_chat():
         return jsonify({"error": "Query cannot be empty"}), 400
     
     
-    ad_placement_data=final_func()
-    orders_labbeling_data = fetch_orders()
-    print("labelssssss", orders_labbeling_data)
-    
-    # Define the ad prompt template
-    AD_PROMPT_TEMPLATE = """
-    Given the following product data, present it in a clear and user-friendly format with a starting message "Here is our Analysis for your direction".
-
-    {context}
-
-    Instructions:
-    - Only give shoes data. No extra explanation
-    - Make sure if the user has specified a number e.g 1,2,3,4 then only give that many shoes in descending order.
-    - If the user asks for the top X products, sort them by Trend Score in descending order and display only the top X.
-    - If no number is specified, display all products in an organized manner.
-    - Show product details in an easy-to-read format with clear labels.
-
-    Example format:
+    #keyword filtering first, then only the data that intent needs
+    intent = classify_admin_query(user_query)
+    context = new_context(ADMIN_DATA_PROVIDERS)
+    if intent == "ad_placement":
+        response = generate_admin_response(user_query, provide(context, "trend_report"), AD_PROMPT_TEMPLATE)
+    elif intent == "order_labelling":
+        response = export_order_labels(provide(context, "new_order_pages"))
+    else:
+        response = UNKNOWN_INTENT_RESPONSE
+    log_context(context, f"admin_chat [{intent}]")
 
-    **Top Trending Products**
-    1️⃣ **Product Name:** <Product Name>
-    - 🏷 **Brand:** <Brand>
-    - 📂 **Category:** <Category>
-    - 📊 **Trend Score:** <Trend Score>
 
-    Answer the question: {question}
-    """
 
+    return jsonify({"response": response})
 
-    #keyword filtering
-    order_labbeling_keywords = ["orders", "summary", "labelling", "labels", "order", "processing"]
-    ad_placement_keywords= ["products", "shoes", "top shoes", "top selling", "ad", "placement", "top"]
-    if any(keyword in user_query.lower() for keyword in ad_placement_keywords):
-        response = generate_admin_response(user_query, ad_placement_data, AD_PROMPT_TEMPLATE)
-    elif any(keyword in user_query.lower() for keyword in order_labbeling_keywords):
-        orders = fetch_orders()
-        if isinstance(orders, tuple):
-            orders = orders[0]  # Ensure it's a list
-        print("Order Dispatch List\n")
-        
-        save_orders_to_word("orders.docx", orders)  # Pass orders directly
-        response = "✅ Your Order Labels Have Been Fetched! 🏷️📦\n📄 Check your order document to view the details. 🚀"
 
 
 
-    return jsonify({"response": response})
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Reports per-provider execution counts and timings and the trend report cache counters."""
+    return jsonify({"providers": provider_stats, "trend_report": final_func_stats})
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the model warmup request has completed, 503 before."""
+    payload, status = readiness()
+    return jsonify(payload), status
 
 
 if __name__ == '__main__':
     create_connection_pool()
     if connection_pool:
+        start_warmup("llama3.1")
         app.run(debug=True, port=5000)
     else:
         print("Failed to create connection pool. Server not started.")
\ No newline at end of file
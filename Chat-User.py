@@ -5,13 +5,21 @@ import json
 import re
 from flask_cors import CORS
 from langchain_ollama import OllamaLLM
+from model_loader import get_model, start_warmup, readiness
 from langchain_core.prompts import ChatPromptTemplate
-import copy
-from flask import Flask, request, jsonify
-from main_call import process_pdf, load_model, handle_prompt, rank_chunks_by_similarity, extract_text_from_file, generate_document_hash,handle_general_prompt
+from flask import Flask, request, jsonify, Response, stream_with_context
+from main_call import process_pdf, load_model, handle_prompt, rank_chunks_by_similarity, extract_text_from_file, generate_document_hash,handle_general_prompt, resolve_document, stream_prompt, build_context
+from retrieval import query_chunks, retrieval_stats
+from answer_cache import get_cached_answer, cache_answer, answer_cache_stats
 import sqlite3
 import hashlib
 import os
+from kb_store import pooled_connection
+from catalog_cache import get_product_data, catalog_stats
+from product_index import build_product_index, filter_product_index
+from filter_parser import build_filter_lexicon, parse_filters
+from filter_cache import get_cached_filters, cache_filters, filter_cache_stats
+from sse import format_sse, SSE_HEADERS
 app = Flask(__name__)
 CORS(app)
 
@@ -20,20 +28,10 @@ DATABASE = 'embeddings_metadata.db'
 
 # --- Utility Functions ---
 def get_db_connection():
-    """Establish and return a database connection."""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Borrow a knowledge-base connection from the shared pool; use as `with get_db_connection() as conn:`."""
+    return pooled_connection(DATABASE)
 
 
-def file_hash(file_path):
-    """Generate SHA256 hash for a file."""
-    hasher = hashlib.sha256()
-    with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
-
 # Database Configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -46,8 +44,11 @@ DB_CONFIG = {
 # Global connection pool
 connection_pool = None
 
+# Which path extract_filters() took, to track the LLM-avoidance rate
+filter_path_stats = {"rules": 0, "cache": 0, "llm": 0}
+
 # Load LLM Model
-model = OllamaLLM(model="llama3.1")
+model = get_model("llama3.1")
 
 def create_connection_pool():
     """Creates a MySQL connection pool."""
@@ -97,14 +98,8 @@ def fetch_products():
         cursor.close()
         connection.close()
 
-def extract_filters(query_text):
-    """Uses LLM to extract filtering criteria from the user query."""
-    filters = {
-        "brand": None,
-        "min_price": None,
-        "max_price": None,
-        "category": None
-    }
+def build_filter_prompt(query_text):
+    """Builds the LLM prompt that extracts filtering criteria from the user query."""
     prompt_template = ChatPromptTemplate.from_template(
         """
         Only Create one single output of JSON STRING. No Code. Only Extract brand, max_price or min_price, and category if present in the query and create a JSON string as specified in the example.
@@ -131,31 +126,64 @@ def extract_filters(query_text):
         ```
         """
     )
+    return prompt_template.format(query=query_text)
+
+def parse_filter_response(response):
+    """Parses the LLM's filter JSON, raising ValueError if it is not a JSON object."""
+    clean_response = re.sub(r"```json\n|\n```", "", response.strip())  # Remove Markdown
+    json_match = re.search(r"\{.*\}", clean_response, re.DOTALL)  # Extract JSON block
+    
+    if json_match:
+        clean_response = json_match.group(0)
+
+    # ✅ Parse JSON response safely
+    filters = json.loads(clean_response)
 
+    if not isinstance(filters, dict):  
+        raise ValueError("Response is not a valid JSON object")
+    
+    return filters
 
-    prompt = prompt_template.format(query=query_text)  
+def extract_filters_llm(query_text):
+    """Uses LLM to extract filtering criteria from the user query."""
+    prompt = build_filter_prompt(query_text)
 
     try:
         response = model(prompt)
+        return parse_filter_response(response)
 
+    except Exception as e:
+        print(f"❌ Error extracting filters: {e}")
+        return {}
 
-        clean_response = re.sub(r"```json\n|\n```", "", response.strip())  # Remove Markdown
-        json_match = re.search(r"\{.*\}", clean_response, re.DOTALL)  # Extract JSON block
-        
-        if json_match:
-            clean_response = json_match.group(0)
+def lookup_filters(query_text, lexicon):
+    """Tries the rule-based parser, then the filter cache.
 
-        # ✅ Parse JSON response safely
-        filters = json.loads(clean_response)
+    Returns the filters and their source, or (None, "llm") when the LLM must be asked.
+    """
+    filters, confident = parse_filters(query_text, lexicon)
+    if confident:
+        return filters, "rules"
 
-        if not isinstance(filters, dict):  
-            raise ValueError("Response is not a valid JSON object")
-        
-        return filters
+    filters = get_cached_filters(query_text, lexicon["digest"])
+    if filters is not None:
+        return filters, "cache"
+    return None, "llm"
 
-    except Exception as e:
-        print(f"❌ Error extracting filters: {e}")
-        return {}
+def extract_filters(query_text, lexicon):
+    """Extracts filters with the rule-based parser, falling back to cached or fresh LLM results.
+
+    Returns the filters and the path taken ("rules", "cache" or "llm").
+    """
+    filters, source = lookup_filters(query_text, lexicon)
+    if filters is None:
+        filters = extract_filters_llm(query_text)
+        if filters:
+            cache_filters(query_text, lexicon["digest"], filters)
+
+    filter_path_stats[source] += 1
+    print(f"🧭 Filters extracted via {source}: {filters}")
+    return filters, source
 
 def transform_product_data(raw_product_data):
     """Converts raw database product data into structured format."""
@@ -176,68 +204,23 @@ def transform_product_data(raw_product_data):
     return transformed_data
 
 
+def load_catalog():
+    """Fetches and transforms the product catalog and builds its filter index and brand lexicon."""
+    product_data = transform_product_data(fetch_products())
+    product_data["index"] = build_product_index(product_data["products"])
+    product_data["lexicon"] = build_filter_lexicon(p["brand"] for p in product_data["products"])
+    return product_data
 
-def filter_products(product_data, filters):
-    """Filters products based on the given filter criteria."""
-    
- 
-    product_data = copy.deepcopy(product_data)
-
-    brand_filter = filters.get("brand")
-    brand_filter = None if brand_filter in [None, "null"] else brand_filter.lower()
-    min_price = filters.get("min_price")
-    max_price = filters.get("max_price")
-
-    category_filter = filters.get("category")
-
- 
-    valid_categories = {"mens collection", "women collection", "kids collection"}
-
-
-    if category_filter and category_filter.lower() in valid_categories:
-        category_filter = category_filter.lower()
-    else:
-        category_filter = None 
-
-
-    filtered_list = []
-    if brand_filter or  category_filter or  min_price and not max_price:
-        print("All filters are empty.")
-        response = "Please provide at least one filter to proceed."
-        for product in product_data:
-            if not isinstance(product, dict):
-                print(f"❌ Skipping invalid product entry: {product}")
-                continue
-
-            if brand_filter:
-                product_brand = product.get("brand", "").lower()
-                if product_brand != brand_filter:
-                    continue
 
-            if isinstance(min_price, (int, float)) or isinstance(max_price, (int, float)):
-                product_price = product.get("price")
-                if isinstance(product_price, (int, float)):  # Ensure product has a valid price
-                    if min_price is not None and product_price < min_price:
-                        continue
-                    if max_price is not None and product_price > max_price:
-                        continue
 
-            if category_filter:
-                product_categories = {cat.lower().strip() for cat in product.get("category", []) if isinstance(cat, str)}
-                if category_filter not in product_categories:
-                    continue
-
-            filtered_list.append(product)
-
-    return copy.deepcopy(filtered_list)
+def format_product(p):
+    """Formats a single product for the chat response."""
+    return f"🛍️ **{p['name']}**\n💰 Price: {p['price']} \n🏷️ Brand: {p['brand']} \n📦 Category: {', '.join(p['category'])} \n👟 Sizes: {', '.join(map(str, p['available_sizes']))}"
 
 
 def generate_response(filtered_products):
 
-    formatted_products = "\n".join(
-        f"🛍️ **{p['name']}**\n💰 Price: {p['price']} \n🏷️ Brand: {p['brand']} \n📦 Category: {', '.join(p['category'])} \n👟 Sizes: {', '.join(map(str, p['available_sizes']))}"
-        for p in filtered_products
-    )
+    formatted_products = "\n".join(format_product(p) for p in filtered_products)
     print(formatted_products)
 
     try:
@@ -247,52 +230,44 @@ def generate_response(filtered_products):
         print(f"❌ Error generating response: {e}")
         return "Error: Unable to process the request. Please try again."
 
-def UserChat(pdf_path, query):
-    if not query:
-        return {"error": "Missing 'question' parameter."}, 400
-    
-    # Extract text for hashing
-    extracted_text = extract_text_from_file(pdf_path)
-    document_hash = generate_document_hash(os.path.basename(pdf_path), extracted_text)
+def kb_document_id(pdf_path):
+    """Resolves the knowledge-base document from its file fingerprint (ingesting it only if new)."""
+    with get_db_connection() as conn:
+        return resolve_document(conn, pdf_path)
+
+def retrieve_context(pdf_path, query):
+    """Returns the knowledge-base context for the query, or None if the document has no chunks."""
+    document_id = kb_document_id(pdf_path)
     
-    # Database Connection
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    # Rank chunks with the configured retrieval backend (TF-IDF, FTS5 BM25 or vectors)
+    with get_db_connection() as conn:
+        ranked_chunks = query_chunks(conn, document_id, query, top_k=5)
     
-    # Check if the document already exists
-    cursor.execute("SELECT id FROM documents WHERE document_hash = ?", (document_hash,))
-    existing_document = cursor.fetchone()
+    if not ranked_chunks:
+        return None
     
-    if existing_document:
-        document_id = existing_document['id']
-    else:
-        # Insert document metadata
-        cursor.execute(
-            "INSERT INTO documents (name, document_hash) VALUES (?, ?)",
-            (os.path.basename(pdf_path), document_hash)
-        )
-        document_id = cursor.lastrowid
+    # Keep only the most relevant sentences, within the context token budget
+    context_text, _ = build_context(query, ranked_chunks)
+    return context_text
 
-        # Process and store chunks
-        process_pdf(pdf_path, conn, document_id)
-        conn.commit()
+def UserChat(pdf_path, query):
+    if not query:
+        return {"error": "Missing 'question' parameter."}, 400
     
-    # Fetch chunks related to this document
-    cursor.execute("SELECT chunk FROM chunks WHERE document_id = ?", (document_id,))
-    chunks = [row['chunk'] for row in cursor.fetchall()]
+    # Reuse the answer to the same or a near-identical earlier question
+    document_id = kb_document_id(pdf_path)
+    cached = get_cached_answer(document_id, query)
+    if cached is not None:
+        return cached
     
-    if not chunks:
-        conn.close()
+    context_text = retrieve_context(pdf_path, query)
+    if context_text is None:
         return {"error": "No chunks found for this document."}, 404
     
-    # Rank chunks and generate a response
-    ranked_chunks = rank_chunks_by_similarity(query, chunks, top_k=5)
-    context_text = " ".join(ranked_chunks)
-    
+    # Generate a response
     model = load_model("llama3.1")
     response = handle_prompt(query, context_text, model, 0.7, 0.9, 300)
-    
-    conn.close()
+    cache_answer(document_id, query, response)
 
     return response
 
@@ -319,18 +294,17 @@ def chat():
     if not user_query:
         return jsonify({"error": "Query cannot be empty"}), 400
 
-    # ✅ Fetch and transform fresh product data
-    raw_product_data = fetch_products()
-    product_data = transform_product_data(raw_product_data)
+    # ✅ Product data is served from the in-process catalog cache
+    product_data = get_product_data(connection_pool, load_catalog)
     
 
     if not product_data["products"]:
         return jsonify({"error": "No product data found."}), 500
 
-    filters = extract_filters(user_query)
+    filters, filter_source = extract_filters(user_query, product_data["lexicon"])
     if any(value not in [None, "null", ""] for value in filters.values()):
         print("✅ At least one filter value is valid:", filters)
-        filtered_products = filter_products(copy.deepcopy(product_data["products"]), filters)  
+        filtered_products = filter_product_index(product_data["index"], filters)
         
 
         if not filtered_products:  
@@ -339,19 +313,96 @@ def chat():
             response = generate_response(filtered_products)
 
 
-        del raw_product_data, product_data, filtered_products, filters
+        del product_data, filtered_products, filters
     else:
         print("⚠️ All filter values are null or empty:", filters)
         response = UserChat("knowledge_base.pdf", user_query)
-    return jsonify({"response": response})
+        if isinstance(response, tuple):
+            # (error body, status) from UserChat
+            return jsonify(response[0]), response[1]
+    return jsonify({"response": response, "filter_source": filter_source})
+
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming variant of /chat that emits the answer as server-sent events.
+
+    Events: "meta" (filter source), "token" ({"token": text} chunks to append),
+    "error" and a final "done".
+    """
+    data = request.get_json()
+    user_query = data.get("query", "").strip()
+
+    if not user_query:
+        return jsonify({"error": "Query cannot be empty"}), 400
+
+    product_data = get_product_data(connection_pool, load_catalog)
+
+    if not product_data["products"]:
+        return jsonify({"error": "No product data found."}), 500
+
+    filters, filter_source = extract_filters(user_query, product_data["lexicon"])
+
+    def generate():
+        yield format_sse({"filter_source": filter_source}, event="meta")
+        try:
+            if any(value not in [None, "null", ""] for value in filters.values()):
+                filtered_products = filter_product_index(product_data["index"], filters)
+                if not filtered_products:
+                    yield format_sse({"token": "This is not available at the moment."}, event="token")
+                for i, product in enumerate(filtered_products):
+                    yield format_sse({"token": ("\n" if i else "") + format_product(product)}, event="token")
+            else:
+                document_id = kb_document_id("knowledge_base.pdf")
+                cached = get_cached_answer(document_id, user_query)
+                context_text = None if cached is not None else retrieve_context("knowledge_base.pdf", user_query)
+                if cached is not None:
+                    yield format_sse({"token": cached}, event="token")
+                elif context_text is None:
+                    yield format_sse({"error": "No chunks found for this document."}, event="error")
+                else:
+                    model = load_model("llama3.1")
+                    tokens = []
+                    for token in stream_prompt(user_query, context_text, model, 0.7, 0.9, 300):
+                        tokens.append(token)
+                        yield format_sse({"token": token}, event="token")
+                    cache_answer(document_id, user_query, "".join(tokens))
+        except Exception as e:
+            print(f"❌ Error streaming response: {e}")
+            yield format_sse({"error": "Unable to process the request. Please try again."}, event="error")
+        yield format_sse({}, event="done")
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+
+def collect_stats():
+    """Gathers catalog cache, filter extraction, retrieval and answer cache counters."""
+    total = sum(filter_path_stats.values())
+    filters = dict(filter_path_stats, llm_avoidance_rate=round(1 - filter_path_stats["llm"] / total, 4) if total else None)
+    return {"catalog": catalog_stats, "filters": filters, "filter_cache": filter_cache_stats, "retrieval": retrieval_stats,
+            "answer_cache": answer_cache_stats}
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Reports catalog cache, filter extraction, retrieval and answer cache counters."""
+    return jsonify(collect_stats())
+
+
 
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the model warmup request has completed, 503 before."""
+    payload, status = readiness()
+    return jsonify(payload), status
 
 
 if __name__ == '__main__':
     create_connection_pool()
     if connection_pool:
+        start_warmup("llama3.1")
         app.run(debug=True, port=5000)
     else:
         print("Failed to create connection pool. Server not started.")
@@ -0,0 +1,123 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from nltk.stem import PorterStemmer
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+# Minimum cosine similarity between two questions' term signatures for a cached answer to be reused.
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.85"))
+ANSWER_CACHE_SIZE = 2000             # answers kept across all documents (LRU)
+ANSWER_CACHE_TTL = 24 * 60 * 60      # seconds a cached answer stays valid
+
+# Negations change the meaning of a question, so they stay in its signature.
+_STOP_WORDS = ENGLISH_STOP_WORDS - {"not", "no", "nor", "never", "without", "cannot"}
+_WORD_PATTERN = re.compile(r"\w+")
+_stemmer = PorterStemmer()
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # (document_id, signature) -> {"terms", "answer", "query", "created_at"}
+_postings = {}             # (document_id, term) -> set of signatures containing the term
+
+answer_cache_stats = {
+    "exact_hits": 0,
+    "similar_hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "invalidations": 0,
+    "hit_rate": None
+}
+
+
+def query_signature(query_text):
+    """Reduce a question to its sorted set of stemmed content words."""
+    words = _WORD_PATTERN.findall(query_text.lower().replace("'", ""))
+    return tuple(sorted({_stemmer.stem(w) for w in words if w not in _STOP_WORDS}))
+
+
+def _update_hit_rate():
+    hits = answer_cache_stats["exact_hits"] + answer_cache_stats["similar_hits"]
+    total = hits + answer_cache_stats["misses"]
+    answer_cache_stats["hit_rate"] = round(hits / total, 4) if total else None
+
+
+def _remove(key):
+    entry = _entries.pop(key)
+    document_id, signature = key
+    for term in entry["terms"]:
+        postings = _postings.get((document_id, term))
+        if postings is not None:
+            postings.discard(signature)
+            if not postings:
+                del _postings[(document_id, term)]
+
+
+def get_cached_answer(document_id, query_text):
+    """Return a cached answer to this or a sufficiently similar question about the document, or None."""
+    signature = query_signature(query_text)
+    now = time.time()
+
+    with _lock:
+        key = (document_id, signature)
+        entry = _entries.get(key)
+        if entry is not None and now - entry["created_at"] < ANSWER_CACHE_TTL:
+            _entries.move_to_end(key)
+            answer_cache_stats["exact_hits"] += 1
+            _update_hit_rate()
+            return entry["answer"]
+
+        # Only cached questions sharing at least one term can be similar enough.
+        terms = set(signature)
+        candidates = set()
+        for term in terms:
+            candidates |= _postings.get((document_id, term), set())
+
+        best_key, best_score = None, 0.0
+        for candidate in candidates:
+            score = len(terms.intersection(candidate)) / math.sqrt(len(terms) * len(candidate))
+            if score > best_score:
+                best_key, best_score = (document_id, candidate), score
+
+        if best_key is not None and best_score >= ANSWER_CACHE_THRESHOLD:
+            entry = _entries[best_key]
+            if now - entry["created_at"] < ANSWER_CACHE_TTL:
+                _entries.move_to_end(best_key)
+                answer_cache_stats["similar_hits"] += 1
+                _update_hit_rate()
+                print(f"♻️ Answer reused from \"{entry['query']}\" (similarity {best_score:.2f})")
+                return entry["answer"]
+            _remove(best_key)
+
+        answer_cache_stats["misses"] += 1
+        _update_hit_rate()
+        return None
+
+
+def cache_answer(document_id, query_text, answer):
+    """Remember the generated answer to a knowledge-base question."""
+    signature = query_signature(query_text)
+    if not signature or not isinstance(answer, str) or not answer.strip():
+        return
+
+    with _lock:
+        key = (document_id, signature)
+        if key in _entries:
+            _remove(key)
+        _entries[key] = {"terms": signature, "answer": answer, "query": query_text, "created_at": time.time()}
+        for term in signature:
+            _postings.setdefault((document_id, term), set()).add(signature)
+
+        while len(_entries) > ANSWER_CACHE_SIZE:
+            _remove(next(iter(_entries)))
+            answer_cache_stats["evictions"] += 1
+
+
+def invalidate_answers(document_id=None):
+    """Drop cached answers for a document (or for every document) after it is reindexed."""
+    with _lock:
+        keys = [key for key in _entries if document_id is None or key[0] == document_id]
+        for key in keys:
+            _remove(key)
+        answer_cache_stats["invalidations"] += 1
@@ -0,0 +1,204 @@
+import asyncio
+import importlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from quart import Quart, jsonify, request, Response
+from quart_cors import cors
+from main_call import ahandle_prompt, astream_prompt
+from model_loader import start_warmup, readiness
+from catalog_cache import get_product_data
+from filter_cache import cache_filters
+from answer_cache import get_cached_answer, cache_answer
+from product_index import filter_product_index
+from sse import format_sse, SSE_HEADERS
+from data_providers import new_context, provide, log_context, provider_stats
+
+# Async (ASGI) serving mode for the user and admin chat endpoints.
+# Run with:  hypercorn asgi_app:app --bind 0.0.0.0:5000
+#
+# The Flask apps are scripts with hyphenated names, so their helpers are loaded by module name.
+chat_user = importlib.import_module("Chat-User")
+chat_admin = importlib.import_module("Chat-Admin")
+
+# Maximum Ollama requests in flight per process; protects the model server.
+OLLAMA_MAX_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_CONCURRENCY", "4"))
+
+# Threads for blocking MySQL/SQLite work; matches the MySQL pool size so the pool is never exhausted.
+DB_WORKERS = int(os.environ.get("DB_WORKERS", "5"))
+
+app = cors(Quart(__name__))
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+_model_slots = asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY)
+
+
+async def run_blocking(fn, *args):
+    """Await a blocking database/file call on the bounded DB executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, fn, *args)
+
+
+async def ainvoke_model(model, prompt):
+    """Await one Ollama completion, waiting for a free model slot first."""
+    async with _model_slots:
+        return await model.ainvoke(prompt)
+
+
+async def aextract_filters(query_text, lexicon):
+    """Async variant of extract_filters() in Chat-User.py."""
+    filters, source = await run_blocking(chat_user.lookup_filters, query_text, lexicon)
+    if filters is None:
+        try:
+            response = await ainvoke_model(chat_user.model, chat_user.build_filter_prompt(query_text))
+            filters = chat_user.parse_filter_response(response)
+        except Exception as e:
+            print(f"❌ Error extracting filters: {e}")
+            filters = {}
+        if filters:
+            await run_blocking(cache_filters, query_text, lexicon["digest"], filters)
+
+    chat_user.filter_path_stats[source] += 1
+    print(f"🧭 Filters extracted via {source}: {filters}")
+    return filters, source
+
+
+async def prepare_chat():
+    """Validate the request and extract filters.
+
+    Returns (error_response, None) or (None, (query, product_data, filters, filter_source)).
+    """
+    data = await request.get_json()
+    user_query = data.get("query", "").strip()
+
+    if not user_query:
+        return (jsonify({"error": "Query cannot be empty"}), 400), None
+
+    product_data = await run_blocking(get_product_data, chat_user.connection_pool, chat_user.load_catalog)
+
+    if not product_data["products"]:
+        return (jsonify({"error": "No product data found."}), 500), None
+
+    filters, filter_source = await aextract_filters(user_query, product_data["lexicon"])
+    return None, (user_query, product_data, filters, filter_source)
+
+
+@app.before_serving
+async def startup():
+    chat_user.create_connection_pool()
+    chat_admin.create_connection_pool()
+    start_warmup("llama3.1")
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """Async variant of /chat."""
+    error, prepared = await prepare_chat()
+    if error:
+        return error
+    user_query, product_data, filters, filter_source = prepared
+
+    if any(value not in [None, "null", ""] for value in filters.values()):
+        filtered_products = filter_product_index(product_data["index"], filters)
+        if not filtered_products:
+            response = "This is not available at the moment."
+        else:
+            response = chat_user.generate_response(filtered_products)
+    else:
+        document_id = await run_blocking(chat_user.kb_document_id, "knowledge_base.pdf")
+        response = get_cached_answer(document_id, user_query)
+        if response is None:
+            context_text = await run_blocking(chat_user.retrieve_context, "knowledge_base.pdf", user_query)
+            if context_text is None:
+                return jsonify({"error": "No chunks found for this document."}), 404
+            async with _model_slots:
+                response = await ahandle_prompt(user_query, context_text, chat_user.model, 0.7, 0.9, 300)
+            cache_answer(document_id, user_query, response)
+
+    return jsonify({"response": response, "filter_source": filter_source})
+
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """Async variant of /chat/stream."""
+    error, prepared = await prepare_chat()
+    if error:
+        return error
+    user_query, product_data, filters, filter_source = prepared
+
+    async def generate():
+        yield format_sse({"filter_source": filter_source}, event="meta")
+        try:
+            if any(value not in [None, "null", ""] for value in filters.values()):
+                filtered_products = filter_product_index(product_data["index"], filters)
+                if not filtered_products:
+                    yield format_sse({"token": "This is not available at the moment."}, event="token")
+                for i, product in enumerate(filtered_products):
+                    yield format_sse({"token": ("\n" if i else "") + chat_user.format_product(product)}, event="token")
+            else:
+                document_id = await run_blocking(chat_user.kb_document_id, "knowledge_base.pdf")
+                cached = get_cached_answer(document_id, user_query)
+                context_text = None
+                if cached is None:
+                    context_text = await run_blocking(chat_user.retrieve_context, "knowledge_base.pdf", user_query)
+                if cached is not None:
+                    yield format_sse({"token": cached}, event="token")
+                elif context_text is None:
+                    yield format_sse({"error": "No chunks found for this document."}, event="error")
+                else:
+                    tokens = []
+                    async with _model_slots:
+                        async for token in astream_prompt(user_query, context_text, chat_user.model, 0.7, 0.9, 300):
+                            tokens.append(token)
+                            yield format_sse({"token": token}, event="token")
+                    cache_answer(document_id, user_query, "".join(tokens))
+        except Exception as e:
+            print(f"❌ Error streaming response: {e}")
+            yield format_sse({"error": "Unable to process the request. Please try again."}, event="error")
+        yield format_sse({}, event="done")
+
+    return Response(generate(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+
+@app.route('/admin-chat', methods=['POST'])
+async def admin_chat():
+    """Async variant of /admin-chat; only loads the data the query's intent needs."""
+    data = await request.get_json()
+    user_query = data.get("query", "").strip()
+    if not user_query:
+        return jsonify({"error": "Query cannot be empty"}), 400
+
+    intent = chat_admin.classify_admin_query(user_query)
+    context = new_context(chat_admin.ADMIN_DATA_PROVIDERS)
+    if intent == "ad_placement":
+        ad_placement_data = await run_blocking(provide, context, "trend_report")
+        prompt = chat_admin.build_admin_prompt(user_query, ad_placement_data, chat_admin.AD_PROMPT_TEMPLATE)
+        try:
+            response = (await ainvoke_model(chat_admin.model, prompt)).strip()
+        except Exception as e:
+            print(f"❌ Error generating response: {e}")
+            response = "Error: Unable to process the request. Please try again."
+    elif intent == "order_labelling":
+        order_pages = await run_blocking(provide, context, "new_order_pages")
+        response = await run_blocking(chat_admin.export_order_labels, order_pages)
+    else:
+        response = chat_admin.UNKNOWN_INTENT_RESPONSE
+    log_context(context, f"admin_chat [{intent}]")
+
+    return jsonify({"response": response})
+
+
+@app.route('/stats', methods=['GET'])
+async def stats():
+    """Reports catalog cache and filter extraction counters, plus admin data provider timings."""
+    return jsonify(dict(chat_user.collect_stats(), admin_providers=provider_stats))
+
+
+@app.route('/ready', methods=['GET'])
+async def ready():
+    """Readiness probe: 200 once the model warmup request has completed, 503 before."""
+    payload, status = readiness()
+    return jsonify(payload), status
+
+
+if __name__ == '__main__':
+    app.run(port=5000)
@@ -0,0 +1,125 @@
+import random
+import re
+import time
+from functools import lru_cache
+
+TREND_CATEGORIES = ("Men", "Women", "Kids")
+
+
+def _trie_pattern(words):
+    """Build a regex alternation factored into a character trie, longest alternatives first."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def to_pattern(node):
+        branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return to_pattern(trie)
+
+
+@lru_cache(maxsize=8)
+def get_matcher(brands, categories=TREND_CATEGORIES):
+    """Compile one matcher for a brand and category vocabulary (tuples); cached until the vocabulary changes.
+
+    Every entry is escaped and the whole vocabulary is compiled into one
+    trie-shaped regex matched on word boundaries against the lowercased text.
+    Entries nested inside a longer one ("Nike" in "Nike Air") are precomputed,
+    so one scan reports every entry the text mentions.
+    """
+    vocabulary = {}   # lowercase entry -> [brand rank, category rank]
+    for kind, names in ((0, brands), (1, categories)):
+        for rank, name in enumerate(names):
+            if name:
+                ranks = vocabulary.setdefault(name.lower(), [None, None])
+                if ranks[kind] is None:
+                    ranks[kind] = rank
+
+    if not vocabulary:
+        return None
+
+    pattern = re.compile(rf"\b{_trie_pattern(vocabulary)}\b")
+
+    # Entries reachable through a longer entry that shares the same start position
+    nested = {}
+    for name in vocabulary:
+        entry_pattern = re.compile(rf"\b{re.escape(name)}\b", re.IGNORECASE)
+        for other in vocabulary:
+            if other != name and len(other) > len(name) and entry_pattern.search(other):
+                nested.setdefault(other, []).append(name)
+
+    return {"pattern": pattern, "vocabulary": vocabulary, "nested": nested, "brands": brands, "categories": categories}
+
+
+def match_post(matcher, text):
+    """Return (brand, category) mentioned in the text, preferring earlier list entries, in a single scan."""
+    if matcher is None or not text:
+        return None, None
+
+    vocabulary, nested = matcher["vocabulary"], matcher["nested"]
+    brand_rank = category_rank = None
+    for name in matcher["pattern"].findall(text.lower()):
+        for entry in [name] + nested.get(name, []):
+            ranks = vocabulary[entry]
+            if ranks[0] is not None and (brand_rank is None or ranks[0] < brand_rank):
+                brand_rank = ranks[0]
+            if ranks[1] is not None and (category_rank is None or ranks[1] < category_rank):
+                category_rank = ranks[1]
+
+    brand = matcher["brands"][brand_rank] if brand_rank is not None else None
+    category = matcher["categories"][category_rank] if category_rank is not None else None
+    return brand, category
+
+
+# ---- BENCHMARK ----
+def _scan_match(text, brands, categories):
+    """Per-keyword reference matcher mirroring the previous extract_info()."""
+    brand = next((b for b in brands if re.search(rf'\b{b}\b', text, re.IGNORECASE)), None)
+    category = next((c for c in categories if re.search(rf'\b{c}\b', text, re.IGNORECASE)), None)
+    return brand, category
+
+
+def _synthetic_posts(n, brands, seed=7):
+    rng = random.Random(seed)
+    filler = ["new", "drop", "today", "sale", "comfort", "style", "running", "street", "limited", "shop", "now", "fresh"]
+    vocabulary = list(brands) + list(TREND_CATEGORIES) + ["women's", "kidswear", "nikes"]
+    posts = []
+    for _ in range(n):
+        words = rng.choices(filler, k=rng.randint(8, 25))
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary).upper() if rng.random() < 0.2 else rng.choice(vocabulary))
+        posts.append(" ".join(words) + ("!" if rng.random() < 0.5 else ""))
+    return posts
+
+
+if __name__ == "__main__":
+    brands = ("Nike", "Adidas", "Reebok", "Puma", "Converse", "SK", "ARF", "Bata", "Servis", "Skechers",
+              "New Balance", "Vans", "Asics", "Fila", "Under Armour", "Hush Puppies", "Ndure", "Borjan", "Stylo", "Nike Air")
+    n = 1_000_000
+    posts = _synthetic_posts(n, brands)
+
+    start = time.perf_counter()
+    matcher = get_matcher(brands)
+    results = [match_post(matcher, post) for post in posts]
+    matcher_seconds = time.perf_counter() - start
+
+    sample = 50_000
+    start = time.perf_counter()
+    expected = [_scan_match(post, brands, TREND_CATEGORIES) for post in posts[:sample]]
+    scan_seconds = (time.perf_counter() - start) * n / sample
+
+    assert results[:sample] == expected
+    matched = sum(1 for brand, category in results if brand and category)
+    print(
+        f"📦 {n:,} posts, {len(brands)} brands, {len(TREND_CATEGORIES)} categories — {matched:,} brand+category matches\n"
+        f"   per-keyword scan {scan_seconds:.1f}s (extrapolated from {sample:,}) | "
+        f"single-pass matcher {matcher_seconds:.1f}s | {scan_seconds / matcher_seconds:.1f}x"
+    )
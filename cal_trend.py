@@ -1,4 +1,5 @@
 import pandas as pd
+import csv
 import json
 import re
 from flask import Flask, jsonify, request
@@ -8,6 +9,9 @@ import json
 from langchain_ollama import OllamaLLM
 from langchain.prompts import ChatPromptTemplate
 from flask_cors import CORS
+from brand_matcher import get_matcher, match_post
+from trend_stream import iter_posts, ranked_scores
+from trend_scoring import calculate_trend_score, iter_scored_batches, add_grouped_scores
 
 
 DB_CONFIG = {
@@ -71,73 +75,55 @@ def fetch_brands():
 
 # Function to extract brand and category dynamically
 def extract_info(text, brands, categories):
-    brand = next((b for b in brands if re.search(rf'\b{b}\b', text, re.IGNORECASE)), None)
-    category = next((c for c in categories if re.search(rf'\b{c}\b', text, re.IGNORECASE)), None)
-    return brand, category
-
-# Function to calculate trend score
-def calculate_trend_score(likes, shares, comments, views):
-    return (likes * 0.4) + (shares * 0.3) + (comments * 0.2) + (views * 0.1)
+    return match_post(get_matcher(tuple(brands), tuple(categories)), text)
 
 # Function to process social media data
 def process_social_media_data(file_path):
-    with open(file_path, 'r') as file:
-        raw_data = json.load(file)
-    
-    
+    """Stream posts from a JSON-array or NDJSON dump, writing matched rows as they are found.
+
+    Returns the number of matched posts and the per-(brand, category) scores;
+    the matched rows themselves are only written to formatted_knowledgebase.csv.
+    """
     known_brands = fetch_brands()  # Expand as needed
     print(known_brands)
     categories = ["Men", "Women", "Kids"]  
+    matcher = get_matcher(tuple(known_brands), tuple(categories))
     
-    processed_data = []
-    for item in raw_data:
-        text = item.get("caption") or item.get("message") or item.get("text", "")
-        brand, category = extract_info(text, known_brands, categories)
+    matched = 0
+    scores = {}
+    with open('formatted_knowledgebase.csv', 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        writer.writerow(["brand", "category", "likes", "shares", "comments", "views", "trend_score"])
         
-        if brand and category:
-            likes = int(item.get("like_count") or item.get("likes", 0))
-            shares = int(item.get("shares", 0))
-            comments = int(item.get("comments_count") or item.get("comments", 0))
-            views = int(item.get("impressions") or item.get("views", 0))
-            
-            trend_score = calculate_trend_score(likes, shares, comments, views)
-            
-            processed_data.append({
-                "brand": brand,
-                "category": category,
-                "likes": likes,
-                "shares": shares,
-                "comments": comments,
-                "views": views,
-                "trend_score": trend_score
-            })
-    
-    df = pd.DataFrame(processed_data)
+        # Matched posts are scored in vectorized batches
+        for keys, columns, trend_scores in iter_scored_batches(iter_posts(file_path), matcher):
+            writer.writerows(
+                (brand, category, *metrics, trend_score)
+                for (brand, category), *metrics, trend_score in zip(
+                    keys, columns["likes"].tolist(), columns["shares"].tolist(),
+                    columns["comments"].tolist(), columns["views"].tolist(), trend_scores.tolist()
+                )
+            )
+            add_grouped_scores(scores, keys, trend_scores)
+            matched += len(keys)
     
-    if df.empty:
+    if not matched:
         print("No matching posts found for the provided keywords.")
-        return df, pd.DataFrame()
-    
-    # Group by brand and category and sum trend scores
-    brand_category_scores = (
-        df.groupby(['brand', 'category'])['trend_score']
-        .sum()
-        .reset_index()
-        .sort_values(by='trend_score', ascending=False)
-    )
+        return 0, pd.DataFrame()
     
-    df.to_csv('formatted_knowledgebase.csv', index=False)
+    # Per-(brand, category) sums, highest first
+    brand_category_scores = pd.DataFrame(ranked_scores(scores))
     brand_category_scores.to_csv('brand_category_scores.csv', index=False)
     
-    return df, brand_category_scores
+    return matched, brand_category_scores
 
 # Example usage
 create_connection_pool()
 file_path = 'final.json'
-df, brand_category_scores = process_social_media_data(file_path)
+matched, brand_category_scores = process_social_media_data(file_path)
 
-if not df.empty:
-    print(df.head())
+if matched:
+    print(f"{matched} matching posts written to formatted_knowledgebase.csv")
     print(brand_category_scores)
 else:
     print("No data processed. Please check the input file and keywords.")
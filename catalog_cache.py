@@ -0,0 +1,108 @@
+import threading
+import time
+from mysql.connector import Error
+
+# Minimum number of seconds between two catalog version probes. Requests inside
+# this window are answered from memory without touching MySQL at all.
+VERSION_PROBE_INTERVAL = 30
+
+_lock = threading.Lock()
+_catalog = None
+_catalog_version = None
+_last_probe = 0.0
+
+catalog_stats = {
+    "hits": 0,
+    "misses": 0,
+    "probes": 0,
+    "rebuilds": 0,
+    "last_rebuild_seconds": None,
+    "total_rebuild_seconds": 0.0,
+    "version": None
+}
+
+
+def fetch_catalog_version(connection_pool):
+    """Fetch a cheap fingerprint of the published product catalog.
+
+    The product count and latest modification time catch added, removed and
+    edited products; the taxonomy counts catch brand/category/size reassignments.
+    """
+    if connection_pool is None:
+        return None
+
+    connection = connection_pool.get_connection()
+    cursor = connection.cursor(dictionary=True)
+
+    try:
+        query = """
+        SELECT
+            (SELECT COUNT(*) FROM wpuz_posts
+             WHERE post_type = 'product' AND post_status = 'publish') AS product_count,
+            (SELECT MAX(post_modified_gmt) FROM wpuz_posts
+             WHERE post_type = 'product' AND post_status = 'publish') AS last_modified,
+            (SELECT SUM(count) FROM wpuz_term_taxonomy
+             WHERE taxonomy IN ('product_cat', 'product_brand', 'pa_size')) AS term_count;
+        """
+        cursor.execute(query)
+        row = cursor.fetchone()
+        return (row["product_count"], str(row["last_modified"]), row["term_count"])
+
+    except Error as e:
+        print(f"❌ Error probing catalog version: {e}")
+        return None
+
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def get_product_data(connection_pool, loader):
+    """Return the cached product catalog, rebuilding it with `loader` when its version changes.
+
+    `loader` is a zero-argument callable returning the transformed catalog
+    (``{"products": [...]}``). An empty catalog is never cached so a database
+    outage does not get pinned in memory.
+    """
+    global _catalog, _catalog_version, _last_probe
+
+    with _lock:
+        now = time.monotonic()
+        if _catalog is not None and now - _last_probe < VERSION_PROBE_INTERVAL:
+            catalog_stats["hits"] += 1
+            return _catalog
+
+        version = fetch_catalog_version(connection_pool)
+        catalog_stats["probes"] += 1
+        _last_probe = now
+
+        # Serve the cached copy if the version is unchanged or could not be probed.
+        if _catalog is not None and (version is None or version == _catalog_version):
+            catalog_stats["hits"] += 1
+            return _catalog
+
+        catalog_stats["misses"] += 1
+        start = time.perf_counter()
+        product_data = loader()
+        elapsed = time.perf_counter() - start
+
+        catalog_stats["rebuilds"] += 1
+        catalog_stats["last_rebuild_seconds"] = round(elapsed, 4)
+        catalog_stats["total_rebuild_seconds"] = round(catalog_stats["total_rebuild_seconds"] + elapsed, 4)
+        print(f"🔄 Product catalog rebuilt in {elapsed:.3f}s (version {version})")
+
+        if product_data.get("products"):
+            _catalog = product_data
+            _catalog_version = version
+            catalog_stats["version"] = str(version)
+
+        return product_data
+
+
+def invalidate_catalog():
+    """Drop the cached catalog so the next request rebuilds it."""
+    global _catalog, _catalog_version, _last_probe
+    with _lock:
+        _catalog = None
+        _catalog_version = None
+        _last_probe = 0.0
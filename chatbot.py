@@ -1,9 +1,11 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 import mysql.connector
 from mysql.connector import Error, pooling
 import json
 from langchain_ollama import OllamaLLM
+from model_loader import get_model, start_warmup, readiness
 from langchain.prompts import ChatPromptTemplate
+from sse import format_sse, SSE_HEADERS
 
 app = Flask(__name__)
 
@@ -21,7 +23,7 @@ connection_pool = None
 
 # Load Ollama Model
 DEFAULT_MODEL_NAME = "llama3.1"
-model = OllamaLLM(model=DEFAULT_MODEL_NAME)
+model = get_model(DEFAULT_MODEL_NAME)
 
 # Create a database connection pool
 def create_connection_pool():
@@ -82,9 +84,9 @@ def fetch_products():
         cursor.close()
         connection.close()  # Return connection to the pool
 
-# Chatbot handler
-def handle_prompt(query_text, product_data, temperature=0.7, top_p=0.9, max_length=500):
-    """Process the user's query using product data."""
+# Chatbot prompt
+def build_prompt(query_text, product_data):
+    """Format the product-grounded prompt for the user's query."""
     PROMPT_TEMPLATE = """
     You are an e-commerce assistant. Answer user queries based only on the following product data:
 
@@ -102,7 +104,12 @@ def handle_prompt(query_text, product_data, temperature=0.7, top_p=0.9, max_leng
 
     # Create prompt
     prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
-    prompt = prompt_template.format(context=context_text, question=query_text)
+    return prompt_template.format(context=context_text, question=query_text)
+
+# Chatbot handler
+def handle_prompt(query_text, product_data, temperature=0.7, top_p=0.9, max_length=500):
+    """Process the user's query using product data."""
+    prompt = build_prompt(query_text, product_data)
     
     try:
         response = "".join(model.stream(prompt, temperature=temperature, top_p=top_p, max_length=max_length))
@@ -131,10 +138,45 @@ def chat():
     response = handle_prompt(user_query, product_data)
     return jsonify({"response": response})
 
+# Streaming API Endpoint: emits "token" server-sent events as the model generates, then "done"
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """API endpoint to stream the answer to a user query."""
+    data = request.get_json()
+    user_query = data.get("query", "").strip()
+
+    if not user_query:
+        return jsonify({"error": "Query cannot be empty"}), 400
+
+    product_data = fetch_products()
+
+    if not product_data:
+        return jsonify({"error": "No product data found."}), 500
+
+    prompt = build_prompt(user_query, product_data)
+
+    def generate():
+        try:
+            for token in model.stream(prompt, temperature=0.7, top_p=0.9, max_length=500):
+                yield format_sse({"token": token}, event="token")
+        except Exception as e:
+            print(f"❌ Error during response generation: {e}")
+            yield format_sse({"error": "Error generating response."}, event="error")
+        yield format_sse({}, event="done")
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the model warmup request has completed, 503 before."""
+    payload, status = readiness()
+    return jsonify(payload), status
+
 # Start Flask server
 if __name__ == '__main__':
     create_connection_pool()
     if connection_pool:
+        start_warmup(DEFAULT_MODEL_NAME)
         app.run(debug=True, port=5000)  
     else:
         print("Failed to create connection pool. Server not started.")
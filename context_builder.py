@@ -0,0 +1,90 @@
+import math
+import os
+import re
+import nltk
+from nltk.stem import PorterStemmer
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+# Maximum size of the retrieved context placed in a RAG prompt, in tokens.
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "600"))
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_WORD_PATTERN = re.compile(r"\w+")
+_stemmer = PorterStemmer()
+
+
+def count_tokens(text):
+    """Approximate the model's token count as words plus punctuation marks."""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _terms(text):
+    return {_stemmer.stem(w) for w in _WORD_PATTERN.findall(text.lower()) if w not in ENGLISH_STOP_WORDS}
+
+
+def build_context(query_text, ranked_chunks, budget=CONTEXT_TOKEN_BUDGET):
+    """Assemble the most relevant sentences of the ranked chunks into at most `budget` tokens.
+
+    Sentences repeated by chunk overlap are kept once. Each sentence is scored
+    by the IDF-weighted query terms it contains, with a small bonus for coming
+    from a higher-ranked chunk; the best ones are taken until the budget is
+    full and emitted in their original order. If no sentence shares a term with
+    the query, the leading sentences of the top chunks are used instead.
+    """
+    sentences = []   # (chunk_rank, position, text, terms)
+    seen = set()
+    duplicates = 0
+    input_tokens = 0
+    for rank, chunk in enumerate(ranked_chunks):
+        input_tokens += count_tokens(chunk)
+        for position, sentence in enumerate(nltk.tokenize.sent_tokenize(chunk)):
+            key = " ".join(sentence.lower().split())
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            sentences.append((rank, position, sentence, _terms(sentence)))
+
+    query_terms = _terms(query_text)
+    document_frequency = {}
+    for _, _, _, terms in sentences:
+        for term in terms & query_terms:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    idf = {term: math.log((len(sentences) + 1) / (df + 1)) + 1 for term, df in document_frequency.items()}
+
+    scored = []
+    for index, (rank, _, _, terms) in enumerate(sentences):
+        score = sum(idf[term] for term in terms & query_terms)
+        if score > 0:
+            scored.append((score + 0.5 / (rank + 1), index))
+    if scored:
+        order = [index for _, index in sorted(scored, key=lambda item: (-item[0], item[1]))]
+    else:
+        order = range(len(sentences))
+
+    chosen = []
+    used = 0
+    for index in order:
+        tokens = count_tokens(sentences[index][2])
+        if used + tokens <= budget:
+            chosen.append(index)
+            used += tokens
+
+    groups = {}
+    for index in sorted(chosen):
+        groups.setdefault(sentences[index][0], []).append(sentences[index][2])
+    context_text = "\n\n".join(" ".join(group) for group in groups.values())
+
+    stats = {
+        "budget": budget,
+        "tokens": used,
+        "input_tokens": input_tokens,
+        "sentences": len(chosen),
+        "candidates": len(sentences),
+        "duplicates": duplicates
+    }
+    print(
+        f"🧮 Context: {used}/{budget} tokens from {input_tokens} retrieved "
+        f"({len(chosen)}/{len(sentences)} sentences kept, {duplicates} duplicates dropped)"
+    )
+    return context_text, stats
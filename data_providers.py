@@ -0,0 +1,72 @@
+import threading
+import time
+from collections.abc import Iterator
+
+# Aggregate accounting across requests: provider name -> {"calls", "total_ms", "last_ms"}
+provider_stats = {}
+_lock = threading.Lock()
+
+
+def new_context(providers):
+    """Start a per-request context over named zero-argument providers; nothing runs yet."""
+    return {"providers": providers, "values": {}, "timings": {}, "streams": set()}
+
+
+def _account(context, name, elapsed_ms, first):
+    """Add time spent in a provider to the request's timings and the aggregate stats."""
+    context["timings"][name] = context["timings"].get(name, 0.0) + elapsed_ms
+    with _lock:
+        stats = provider_stats.setdefault(name, {"calls": 0, "total_ms": 0.0, "last_ms": None})
+        if first:
+            stats["calls"] += 1
+            stats["last_ms"] = 0.0
+        stats["total_ms"] = round(stats["total_ms"] + elapsed_ms, 2)
+        stats["last_ms"] = round(stats["last_ms"] + elapsed_ms, 2)
+
+
+def _timed(context, name, iterator):
+    """Pass a lazy provider's items through, charging the time spent producing each one to the provider."""
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _account(context, name, (time.perf_counter() - start) * 1000, first=False)
+        yield item
+
+
+def provide(context, name):
+    """Return the provider's value, running it on first use within the request only.
+
+    A provider that returns an iterator (e.g. a generator of pages) does its
+    work as the caller consumes it, so the iterator is wrapped and that time is
+    recorded too. It can only be consumed once, so providing it a second time
+    in the same request raises RuntimeError.
+    """
+    values = context["values"]
+    if name in context["streams"]:
+        raise RuntimeError(f"Provider {name!r} returned a one-shot iterator that this request already took")
+    if name not in values:
+        start = time.perf_counter()
+        value = context["providers"][name]()
+        _account(context, name, (time.perf_counter() - start) * 1000, first=True)
+        if isinstance(value, Iterator):
+            context["streams"].add(name)
+            value = _timed(context, name, value)
+        values[name] = value
+    return values[name]
+
+
+def context_report(context):
+    """Which providers this request executed (with ms) and which it never needed."""
+    executed = {name: round(ms, 2) for name, ms in context["timings"].items()}
+    return {"executed": executed, "skipped": sorted(set(context["providers"]) - set(executed))}
+
+
+def log_context(context, label):
+    report = context_report(context)
+    executed = ", ".join(f"{name} {ms:.1f} ms" for name, ms in report["executed"].items()) or "none"
+    print(f"🧮 {label}: ran {executed}; skipped {', '.join(report['skipped']) or 'none'}")
+    return report
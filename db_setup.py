@@ -1,6 +1,11 @@
 import sqlite3
 import json
 import nltk
+from kb_store import connect, init_indexes
+from tfidf_index import init_tfidf_table, build_tfidf_index
+from fts_index import init_fts_table
+from vector_index import init_vector_table, build_vector_index
+from answer_cache import invalidate_answers
 
 nltk.download('punkt')
 
@@ -9,7 +14,7 @@ def init_db():
     """Initialize SQLite database with required tables."""
     try:
         print("🔄 Initializing database...")
-        conn = sqlite3.connect('embeddings_metadata.db')
+        conn = connect()
         c = conn.cursor()
         
         # Create documents table
@@ -45,6 +50,21 @@ def init_db():
             )
         ''')
         
+        # Index chunks/embeddings by document for per-document lookups
+        init_indexes(conn)
+        
+        # Create the FTS5 chunk index (kept in sync with chunks by triggers)
+        init_fts_table(conn)
+        
+        # Create TF-IDF index table (fitted once per document at ingest time)
+        init_tfidf_table(conn)
+        
+        # Create chunk vectors table (one embedding per chunk)
+        init_vector_table(conn)
+        
+        # Create document files table (cheap file fingerprints -> document)
+        init_document_files_table(conn)
+        
         conn.commit()
         print("✅ Database initialized successfully.")
         return conn
@@ -57,6 +77,21 @@ def init_db():
         conn.close()
 
 
+def init_document_files_table(db_conn):
+    """Create the table mapping source files (path, size, mtime, SHA-256) to ingested documents."""
+    db_conn.execute('''
+        CREATE TABLE IF NOT EXISTS document_files (
+            path TEXT PRIMARY KEY,
+            document_id INTEGER,
+            size INTEGER,
+            mtime_ns INTEGER,
+            file_hash TEXT,
+            FOREIGN KEY(document_id) REFERENCES documents(id)
+        )
+    ''')
+    db_conn.execute("CREATE INDEX IF NOT EXISTS idx_document_files_hash ON document_files(file_hash)")
+
+
 def insert_metadata(db_conn, chunk, section, page, tables, document_id):
     """Insert chunk metadata into SQLite database linked to a document."""
     try:
@@ -82,27 +117,51 @@ def extract_and_store_chunks(text, db_conn, document_id, section="General", page
     
     chunks = chunk_text(text, max_tokens=500, overlap=50)
     
-    cursor = db_conn.cursor()
-    for chunk in chunks:
-        cursor.execute(
-            "INSERT INTO chunks (document_id, chunk) VALUES (?, ?)",
-            (document_id, chunk)
-        )
+    insert_chunks(db_conn, document_id, chunks)
     db_conn.commit()
+    build_tfidf_index(db_conn, document_id)
+    build_vector_index(db_conn, document_id)
+    invalidate_answers(document_id)
     print("✅ Chunks successfully stored in the database.")
 
 
+def insert_chunks(db_conn, document_id, chunks):
+    """Bulk insert chunks for a document (the caller commits)."""
+    db_conn.executemany(
+        "INSERT INTO chunks (document_id, chunk) VALUES (?, ?)",
+        ((document_id, chunk) for chunk in chunks)
+    )
+
+
 def chunk_text(text, max_tokens=2000, overlap=100):
     """Split text into chunks with some overlap."""
-    sentences = nltk.tokenize.sent_tokenize(text)
-    chunks = []
+    return list(iter_chunks(nltk.tokenize.sent_tokenize(text), max_tokens, overlap))
+
+
+def iter_sentences(texts):
+    """Sentence-tokenize a stream of text pieces (e.g. pages) without joining them into one string.
+
+    The last sentence of each piece may continue on the next one, so it is
+    carried over and tokenized again together with the following piece.
+    """
+    carry = ""
+    for text in texts:
+        sentences = nltk.tokenize.sent_tokenize(carry + text)
+        carry = sentences.pop() if sentences else ""
+        yield from sentences
+    if carry:
+        yield carry
+
+
+def iter_chunks(sentences, max_tokens=2000, overlap=100):
+    """Group a stream of sentences into chunks of at most max_tokens words, overlapping by `overlap` sentences."""
     current_chunk = []
     current_length = 0
 
     for sentence in sentences:
         sentence_length = len(sentence.split())
         if current_length + sentence_length > max_tokens:
-            chunks.append(" ".join(current_chunk))
+            yield " ".join(current_chunk)
             current_chunk = current_chunk[-overlap:]
             current_length = sum(len(chunk.split()) for chunk in current_chunk)
 
@@ -110,9 +169,7 @@ def chunk_text(text, max_tokens=2000, overlap=100):
         current_length += sentence_length
 
     if current_chunk:
-        chunks.append(" ".join(current_chunk))
-    
-    return chunks
+        yield " ".join(current_chunk)
 
 
 if __name__ == '__main__':
@@ -2,26 +2,43 @@ import PyPDF2
 import os
 from docx import Document
 
-def extract_text_from_file(file_path):
-    """Extract text from a PDF or Word document."""
+def iter_pages(file_path):
+    """Yield the text of a PDF or Word document piece by piece (one PDF page or DOCX paragraph at a time)."""
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"❌ Error: File '{file_path}' not found.")
     
     _, file_extension = os.path.splitext(file_path)
-    text = ""
     
     if file_extension.lower() == '.pdf':
         # Handle PDF files
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
             for page in pdf_reader.pages:
-                text += page.extract_text() or ""
+                yield page.extract_text() or ""
     elif file_extension.lower() == '.docx':
         # Handle Word files
         doc = Document(file_path)
         for para in doc.paragraphs:
-            text += para.text + '\n'
+            yield para.text + '\n'
     else:
         raise ValueError("❌ Unsupported file format. Please provide a PDF or DOCX file.")
-    
-    return text
+
+def extract_text_from_file(file_path):
+    """Extract text from a PDF or Word document."""
+    return "".join(iter_pages(file_path))
+
+def count_pages(file_path):
+    """Return the number of pages in a PDF (a DOCX counts as a single unit)."""
+    if os.path.splitext(file_path)[1].lower() != '.pdf':
+        return 1
+    with open(file_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def extract_pages(task):
+    """Extract pages [start, stop) of a file; `task` is (file_path, start, stop). Runs in worker processes."""
+    file_path, start, stop = task
+    if os.path.splitext(file_path)[1].lower() != '.pdf':
+        return list(iter_pages(file_path))
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
@@ -0,0 +1,146 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+FILTER_CACHE_DB = 'filter_cache.db'
+FILTER_CACHE_TTL = 24 * 60 * 60      # seconds an extracted filter set stays valid
+FILTER_CACHE_MEMORY_SIZE = 1024      # entries kept in the in-memory LRU tier
+FILTER_CACHE_DISK_SIZE = 50000       # entries kept in the SQLite tier
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_conn = None
+_taxonomy = None
+
+filter_cache_stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "invalidations": 0
+}
+
+
+def normalize_query(query_text):
+    """Fold case, whitespace and punctuation so trivially different queries share a cache key."""
+    text = unicodedata.normalize("NFKC", query_text).lower()
+    text = re.sub(r"(?<=\d),(?=\d)", "", text)   # 5,000 -> 5000
+    text = re.sub(r"['’]", "", text)             # men's -> mens
+    text = re.sub(r"[^\w.]+|(?<!\d)\.|\.(?!\d)", " ", text)
+    return " ".join(text.split())
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(FILTER_CACHE_DB, check_same_thread=False)
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS filter_cache (
+                query TEXT PRIMARY KEY,
+                taxonomy TEXT,
+                filters TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+        ''')
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_filter_cache_last_used ON filter_cache(last_used)")
+        _conn.commit()
+    return _conn
+
+
+def _check_taxonomy(taxonomy):
+    """Drop every cached entry extracted against a different brand taxonomy."""
+    global _taxonomy
+    if taxonomy == _taxonomy:
+        return
+    conn = _get_conn()
+    deleted = conn.execute("DELETE FROM filter_cache WHERE taxonomy != ?", (taxonomy,)).rowcount
+    conn.commit()
+    if _taxonomy is not None or deleted:
+        filter_cache_stats["invalidations"] += 1
+        print(f"🧹 Brand taxonomy changed, dropped {deleted} cached filter sets")
+    _memory.clear()
+    _taxonomy = taxonomy
+
+
+def _remember(key, filters, created_at):
+    _memory[key] = (filters, created_at)
+    _memory.move_to_end(key)
+    while len(_memory) > FILTER_CACHE_MEMORY_SIZE:
+        _memory.popitem(last=False)
+        filter_cache_stats["evictions"] += 1
+
+
+def get_cached_filters(query_text, taxonomy):
+    """Return cached filters for the query, or None on a miss."""
+    key = normalize_query(query_text)
+    now = time.time()
+
+    with _lock:
+        _check_taxonomy(taxonomy)
+
+        entry = _memory.get(key)
+        if entry is not None:
+            filters, created_at = entry
+            if now - created_at < FILTER_CACHE_TTL:
+                _memory.move_to_end(key)
+                filter_cache_stats["memory_hits"] += 1
+                return dict(filters)
+            del _memory[key]
+
+        conn = _get_conn()
+        row = conn.execute("SELECT filters, created_at FROM filter_cache WHERE query = ?", (key,)).fetchone()
+        if row is not None:
+            if now - row[1] < FILTER_CACHE_TTL:
+                conn.execute("UPDATE filter_cache SET last_used = ? WHERE query = ?", (now, key))
+                conn.commit()
+                filters = json.loads(row[0])
+                _remember(key, filters, row[1])
+                filter_cache_stats["disk_hits"] += 1
+                return dict(filters)
+            conn.execute("DELETE FROM filter_cache WHERE query = ?", (key,))
+            conn.commit()
+
+        filter_cache_stats["misses"] += 1
+        return None
+
+
+def cache_filters(query_text, taxonomy, filters):
+    """Store extracted filters in both cache tiers."""
+    key = normalize_query(query_text)
+    now = time.time()
+
+    with _lock:
+        _check_taxonomy(taxonomy)
+        _remember(key, dict(filters), now)
+
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO filter_cache (query, taxonomy, filters, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, taxonomy, json.dumps(filters), now, now)
+        )
+        conn.execute("DELETE FROM filter_cache WHERE created_at < ?", (now - FILTER_CACHE_TTL,))
+        overflow = conn.execute("SELECT COUNT(*) FROM filter_cache").fetchone()[0] - FILTER_CACHE_DISK_SIZE
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM filter_cache WHERE query IN (SELECT query FROM filter_cache ORDER BY last_used LIMIT ?)",
+                (overflow,)
+            )
+            filter_cache_stats["evictions"] += overflow
+        conn.commit()
+
+
+def invalidate_filter_cache():
+    """Empty both cache tiers."""
+    global _taxonomy
+    with _lock:
+        conn = _get_conn()
+        conn.execute("DELETE FROM filter_cache")
+        conn.commit()
+        _memory.clear()
+        _taxonomy = None
+        filter_cache_stats["invalidations"] += 1
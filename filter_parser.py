@@ -0,0 +1,119 @@
+import hashlib
+import re
+
+# Category synonyms mapped onto the fixed category set used by the store.
+CATEGORY_SYNONYMS = {
+    "Mens Collection": ["men", "mens", "men's", "man", "male", "gents", "gentlemen"],
+    "Women Collection": ["women", "womens", "women's", "woman", "ladies", "lady", "female"],
+    "Kids Collection": ["kids", "kid", "kid's", "kids'", "children", "childrens", "children's", "child", "boys", "girls", "junior"]
+}
+
+# Words that suggest the user is shopping; a query with none of these and no
+# extracted filter is routed straight to the knowledge base.
+PRODUCT_HINTS = [
+    "shoe", "shoes", "sneaker", "sneakers", "trainer", "trainers", "boot", "boots", "sandal", "sandals",
+    "slipper", "slippers", "heel", "heels", "loafer", "loafers", "joggers", "footwear", "brand", "brands",
+    "price", "prices", "cheap", "cheaper", "cheapest", "expensive", "budget", "collection", "rs", "pkr", "rupees"
+]
+
+NEGATIONS = ["not", "no", "except", "without", "excluding", "other than", "apart from", "besides"]
+
+_AMOUNT = r"(?:rs\.?|pkr|₨)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k)?\s*(?:rs\.?|pkr|rupees)?"
+_RANGE_PATTERN = re.compile(rf"\b(?:between|from)\s+{_AMOUNT}\s*(?:and|to|-)\s*{_AMOUNT}", re.IGNORECASE)
+_MAX_PATTERN = re.compile(
+    rf"\b(?:not more than|no more than|under|below|less than|cheaper than|lower than|up to|upto|within|"
+    rf"max(?:imum)?|at most)\s+{_AMOUNT}",
+    re.IGNORECASE
+)
+_MIN_PATTERN = re.compile(
+    rf"\b(?:above|over|more than|greater than|higher than|at least|min(?:imum)?|starting (?:from|at))\s+{_AMOUNT}",
+    re.IGNORECASE
+)
+_SIZE_PATTERN = re.compile(r"\bsize\s*\d+(?:\.\d+)?", re.IGNORECASE)
+_DIGIT_PATTERN = re.compile(r"\d")
+
+
+def _word_pattern(words):
+    """Compile a case-insensitive whole-word alternation, longest alternatives first."""
+    alternation = "|".join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+
+
+_CATEGORY_LOOKUP = {word: category for category, words in CATEGORY_SYNONYMS.items() for word in words}
+_CATEGORY_PATTERN = _word_pattern(_CATEGORY_LOOKUP)
+_PRODUCT_HINT_PATTERN = _word_pattern(PRODUCT_HINTS)
+_NEGATION_PATTERN = _word_pattern(NEGATIONS)
+
+
+def build_filter_lexicon(brands):
+    """Build the brand lexicon used by parse_filters() from the live brand list."""
+    canonical = {}
+    for brand in brands:
+        for name in str(brand or "").split(","):
+            name = name.strip()
+            if name:
+                canonical.setdefault(name.lower(), name)
+
+    return {
+        "brands": canonical,
+        "brand_pattern": _word_pattern(canonical) if canonical else None,
+        "digest": hashlib.sha256("\n".join(sorted(canonical.values())).encode("utf-8")).hexdigest()
+    }
+
+
+def _amount(number, thousands):
+    value = float(number.replace(",", ""))
+    if thousands:
+        value *= 1000
+    return int(value) if value.is_integer() else value
+
+
+def parse_filters(query_text, lexicon):
+    """Extract brand, price bounds and category from a query without the LLM.
+
+    Returns ``(filters, confident)``. ``confident`` is False when the query has
+    something the rules cannot account for (unparsed numbers, negations, more
+    than one brand or category, an inverted price range, or shopping words with
+    no recognizable filter), in which case the caller should ask the LLM.
+    """
+    filters = {"brand": None, "min_price": None, "max_price": None, "category": None}
+    remaining = query_text
+
+    range_match = _RANGE_PATTERN.search(remaining)
+    if range_match:
+        filters["min_price"] = _amount(range_match.group(1), range_match.group(2))
+        filters["max_price"] = _amount(range_match.group(3), range_match.group(4))
+        remaining = remaining[:range_match.start()] + " " + remaining[range_match.end():]
+
+    for pattern, key in ((_MAX_PATTERN, "max_price"), (_MIN_PATTERN, "min_price")):
+        matches = list(pattern.finditer(remaining))
+        if len(matches) > 1 or (matches and filters[key] is not None):
+            return filters, False
+        if matches:
+            filters[key] = _amount(matches[0].group(1), matches[0].group(2))
+            remaining = remaining[:matches[0].start()] + " " + remaining[matches[0].end():]
+
+    remaining = _SIZE_PATTERN.sub(" ", remaining)
+    if _DIGIT_PATTERN.search(remaining) or _NEGATION_PATTERN.search(remaining):
+        return filters, False
+
+    if filters["min_price"] is not None and filters["max_price"] is not None and filters["min_price"] > filters["max_price"]:
+        return filters, False
+
+    if lexicon["brand_pattern"] is not None:
+        brands = {lexicon["brands"][m.group(0).lower()] for m in lexicon["brand_pattern"].finditer(remaining)}
+        if len(brands) > 1:
+            return filters, False
+        if brands:
+            filters["brand"] = brands.pop()
+
+    categories = {_CATEGORY_LOOKUP[m.group(0).lower()] for m in _CATEGORY_PATTERN.finditer(remaining)}
+    if len(categories) > 1:
+        return filters, False
+    if categories:
+        filters["category"] = categories.pop()
+
+    if all(value is None for value in filters.values()) and _PRODUCT_HINT_PATTERN.search(remaining):
+        return filters, False
+
+    return filters, True
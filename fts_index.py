@@ -0,0 +1,75 @@
+import re
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def init_fts_table(db_conn):
+    """Create the FTS5 index over chunks and the triggers that keep it in sync.
+
+    The virtual table is external-content (it stores only the inverted index,
+    not a second copy of the text). Chunks that already exist when the table is
+    first created are indexed with a one-off rebuild.
+    """
+    exists = db_conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+    ).fetchone()
+    if exists:
+        return
+
+    db_conn.execute('''
+        CREATE VIRTUAL TABLE chunks_fts USING fts5(
+            chunk,
+            content='chunks',
+            content_rowid='id',
+            tokenize='porter unicode61'
+        )
+    ''')
+    db_conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+            INSERT INTO chunks_fts (rowid, chunk) VALUES (new.id, new.chunk);
+        END
+    ''')
+    db_conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, chunk) VALUES ('delete', old.id, old.chunk);
+        END
+    ''')
+    db_conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_update AFTER UPDATE OF chunk ON chunks BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, chunk) VALUES ('delete', old.id, old.chunk);
+            INSERT INTO chunks_fts (rowid, chunk) VALUES (new.id, new.chunk);
+        END
+    ''')
+    db_conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+    db_conn.commit()
+    print("✅ FTS5 chunk index created.")
+
+
+def build_match_expression(query_text):
+    """Turn free text into an FTS5 OR-query of quoted terms, dropping stop words.
+
+    Stop words would match nearly every chunk in a large knowledge base and
+    barely move BM25 scores, so they are left out unless nothing else remains.
+    """
+    tokens = list(dict.fromkeys(_TOKEN_PATTERN.findall(query_text.lower())))
+    terms = [t for t in tokens if t not in ENGLISH_STOP_WORDS] or tokens
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+def query_fts_index(db_conn, document_id, query_text, top_k=5):
+    """Return the document's top-k chunks for the query, ranked by BM25 inside SQLite."""
+    match = build_match_expression(query_text)
+    if not match:
+        return []
+
+    init_fts_table(db_conn)
+    rows = db_conn.execute('''
+        SELECT chunks.chunk
+        FROM chunks_fts
+        JOIN chunks ON chunks.id = chunks_fts.rowid
+        WHERE chunks_fts MATCH ? AND chunks.document_id = ?
+        ORDER BY bm25(chunks_fts)
+        LIMIT ?
+    ''', (match, document_id, top_k)).fetchall()
+    return [row[0] for row in rows]
@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from multiprocessing import Pool
+from db_setup import init_db, init_document_files_table, insert_chunks, iter_chunks, iter_sentences
+from extract_text import count_pages, extract_pages
+from main_call import get_db_connection, file_hash
+from tfidf_index import build_tfidf_index
+from vector_index import build_vector_index
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+PAGES_PER_TASK = 8        # PDF pages extracted per worker task
+CHUNK_BATCH_SIZE = 256    # chunks per executemany() call
+
+
+def find_documents(directory):
+    """List the PDF/DOCX files under a directory, in a stable order."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.abspath(os.path.join(root, name)))
+    return sorted(paths)
+
+
+def plan_tasks(file_path, pages_per_task):
+    """Split a file into (file_path, start, stop) page ranges for the worker pool."""
+    page_count = count_pages(file_path)
+    return [(file_path, start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+def store_document(db_conn, file_path, digest, task_count, results):
+    """Chunk and bulk-insert one document from its stream of extracted page batches.
+
+    `results` yields the extracted text of the file's tasks in order; exactly
+    `task_count` items are consumed even if the document cannot be stored.
+    Returns the number of chunks stored.
+    """
+    name = os.path.basename(file_path)
+    # Same value generate_document_hash() computes over the joined text, built incrementally.
+    hasher = hashlib.sha256(name.encode('utf-8'))
+
+    def page_texts():
+        for _ in range(task_count):
+            for text in next(results):
+                hasher.update(text.encode('utf-8'))
+                yield text
+
+    texts = page_texts()
+    cursor = db_conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO documents (name, document_hash) VALUES (?, ?)",
+            (name, f"pending:{digest}")
+        )
+    except sqlite3.IntegrityError as e:
+        print(f"❌ Skipping '{name}': {e}")
+        db_conn.rollback()
+        for _ in texts:
+            pass
+        return 0
+    document_id = cursor.lastrowid
+
+    chunk_count = 0
+    batch = []
+    for chunk in iter_chunks(iter_sentences(texts), max_tokens=500, overlap=50):
+        batch.append(chunk)
+        if len(batch) >= CHUNK_BATCH_SIZE:
+            insert_chunks(db_conn, document_id, batch)
+            chunk_count += len(batch)
+            batch = []
+    insert_chunks(db_conn, document_id, batch)
+    chunk_count += len(batch)
+
+    document_hash = hasher.hexdigest()
+    existing_document = cursor.execute(
+        "SELECT id FROM documents WHERE document_hash = ?", (document_hash,)
+    ).fetchone()
+    if existing_document:
+        # Same content already ingested under another file: point this file at it instead.
+        db_conn.rollback()
+        document_id, chunk_count = existing_document[0], 0
+    else:
+        cursor.execute("UPDATE documents SET document_hash = ? WHERE id = ?", (document_hash, document_id))
+
+    stat = os.stat(file_path)
+    cursor.execute(
+        "INSERT OR REPLACE INTO document_files (path, document_id, size, mtime_ns, file_hash) VALUES (?, ?, ?, ?, ?)",
+        (file_path, document_id, stat.st_size, stat.st_mtime_ns, digest)
+    )
+    db_conn.commit()
+
+    if chunk_count:
+        build_tfidf_index(db_conn, document_id)
+        build_vector_index(db_conn, document_id)
+    return chunk_count
+
+
+def ingest_directory(directory, workers=None, pages_per_task=PAGES_PER_TASK):
+    """Extract, chunk and store every new PDF/DOCX under `directory`, reporting pages/sec."""
+    init_db()
+    db_conn = get_db_connection()
+    init_document_files_table(db_conn)
+
+    # Skip files whose exact bytes were already ingested.
+    pending = []
+    for file_path in find_documents(directory):
+        digest = file_hash(file_path)
+        if db_conn.execute("SELECT 1 FROM document_files WHERE file_hash = ?", (digest,)).fetchone():
+            print(f"✅ Already ingested: {os.path.basename(file_path)}")
+            continue
+        pending.append((file_path, digest, plan_tasks(file_path, pages_per_task)))
+
+    total_pages = sum(stop - start for _, _, tasks in pending for _, start, stop in tasks)
+    print(f"📚 {len(pending)} new documents, {total_pages} pages, {workers or os.cpu_count()} workers")
+
+    start_time = time.perf_counter()
+    total_chunks = 0
+    with Pool(processes=workers) as pool:
+        # One ordered stream of page batches across all files keeps every worker busy.
+        all_tasks = [task for _, _, tasks in pending for task in tasks]
+        results = pool.imap(extract_pages, all_tasks)
+
+        for file_path, digest, tasks in pending:
+            file_start = time.perf_counter()
+            chunk_count = store_document(db_conn, file_path, digest, len(tasks), results)
+            total_chunks += chunk_count
+            pages = sum(stop - start for _, start, stop in tasks)
+            elapsed = time.perf_counter() - file_start
+            print(f"📄 {os.path.basename(file_path)}: {pages} pages, {chunk_count} chunks in {elapsed:.2f}s")
+
+    db_conn.close()
+    elapsed = time.perf_counter() - start_time
+    rate = total_pages / elapsed if elapsed > 0 else 0.0
+    print(f"✅ Ingested {total_pages} pages into {total_chunks} chunks in {elapsed:.2f}s ({rate:.1f} pages/sec)")
+    return {"documents": len(pending), "pages": total_pages, "chunks": total_chunks, "seconds": elapsed, "pages_per_sec": rate}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Batch-ingest a directory of PDF/DOCX files into the knowledge base.")
+    parser.add_argument("directory", help="Directory to scan for .pdf and .docx files")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--pages-per-task", type=int, default=PAGES_PER_TASK, help="PDF pages per worker task")
+    args = parser.parse_args()
+    ingest_directory(args.directory, args.workers, args.pages_per_task)
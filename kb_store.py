@@ -0,0 +1,189 @@
+import os
+import queue
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+DATABASE = 'embeddings_metadata.db'
+
+# Applied to every knowledge-base connection. WAL lets readers run while a
+# document is being ingested; NORMAL sync is durable across application crashes
+# in WAL mode and avoids an fsync per commit.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456"     # 256 MB memory-mapped reads
+)
+
+# Connections kept per database file. Flask's dev server starts a thread per
+# request, so connections are borrowed from a shared pool rather than tied to
+# a thread; handlers wait for a free one once all are in use.
+POOL_SIZE = int(os.getenv("KB_POOL_SIZE", "4"))
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks(document_id)",
+    "CREATE INDEX IF NOT EXISTS idx_embeddings_document_id ON embeddings(document_id)"
+)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def configure_connection(conn):
+    """Apply the knowledge-base pragmas to a connection."""
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def connect(database=DATABASE, check_same_thread=True):
+    """Open a new, configured connection (the caller closes it)."""
+    conn = sqlite3.connect(database, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    return configure_connection(conn)
+
+
+def _get_pool(database):
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None:
+            pool = _pools[database] = {"idle": queue.LifoQueue(), "created": 0, "lock": threading.Lock()}
+        return pool
+
+
+@contextmanager
+def pooled_connection(database=DATABASE, timeout=None):
+    """Borrow a configured connection from the database's bounded pool and return it afterwards.
+
+    At most POOL_SIZE connections are opened per database; once all are
+    borrowed, callers wait (up to `timeout` seconds) for one to come back.
+    A transaction left open by the borrower is rolled back before reuse.
+    """
+    pool = _get_pool(database)
+    try:
+        conn = pool["idle"].get_nowait()
+    except queue.Empty:
+        conn = None
+        with pool["lock"]:
+            if pool["created"] < POOL_SIZE:
+                pool["created"] += 1
+                try:
+                    conn = connect(database, check_same_thread=False)
+                except BaseException:
+                    pool["created"] -= 1
+                    raise
+        if conn is None:
+            conn = pool["idle"].get(timeout=timeout)
+
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        pool["idle"].put(conn)
+
+
+def close_pool(database=DATABASE):
+    """Close the idle connections of a database's pool."""
+    pool = _get_pool(database)
+    while True:
+        try:
+            pool["idle"].get_nowait().close()
+        except queue.Empty:
+            break
+        with pool["lock"]:
+            pool["created"] -= 1
+
+
+def init_indexes(db_conn):
+    """Create the secondary indexes used by per-document lookups."""
+    for statement in INDEXES:
+        db_conn.execute(statement)
+
+
+# ---- BENCHMARK ----
+_SCHEMA = (
+    "CREATE TABLE documents (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, document_hash TEXT UNIQUE)",
+    "CREATE TABLE chunks (id INTEGER PRIMARY KEY AUTOINCREMENT, document_id INTEGER, chunk TEXT)",
+    "CREATE TABLE embeddings (id INTEGER PRIMARY KEY AUTOINCREMENT, document_id INTEGER, chunk TEXT, "
+    "section TEXT, page INTEGER, tables TEXT)"
+)
+
+
+def _synthetic_chunks(documents, chunks_per_document, seed=7):
+    rng = random.Random(seed)
+    words = ["shoe", "return", "policy", "delivery", "size", "exchange", "order", "refund", "store", "payment"]
+    return [
+        (document_id, " ".join(rng.choice(words) for _ in range(80)))
+        for document_id in range(1, documents + 1)
+        for _ in range(chunks_per_document)
+    ]
+
+
+def _bench_ingest(database, rows, optimized):
+    conn = connect(database) if optimized else sqlite3.connect(database)
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    if optimized:
+        init_indexes(conn)
+    conn.commit()
+
+    start = time.perf_counter()
+    if optimized:
+        with conn:
+            conn.executemany("INSERT INTO chunks (document_id, chunk) VALUES (?, ?)", rows)
+    else:
+        for row in rows:
+            conn.execute("INSERT INTO chunks (document_id, chunk) VALUES (?, ?)", row)
+            conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return len(rows) / elapsed
+
+
+def _bench_lookup(database, documents, optimized, lookups=300):
+    """Per-request lookup latency, each request on a fresh thread like Flask's threaded dev server."""
+    rng = random.Random(11)
+    latencies = []
+
+    def request(document_id):
+        start = time.perf_counter()
+        if optimized:
+            with pooled_connection(database) as conn:
+                conn.execute("SELECT id, chunk FROM chunks WHERE document_id = ?", (document_id,)).fetchall()
+        else:
+            conn = sqlite3.connect(database)
+            conn.execute("SELECT id, chunk FROM chunks WHERE document_id = ?", (document_id,)).fetchall()
+            conn.close()
+        latencies.append(time.perf_counter() - start)
+
+    for _ in range(lookups):
+        thread = threading.Thread(target=request, args=(rng.randint(1, documents),))
+        thread.start()
+        thread.join()
+    if optimized:
+        close_pool(database)
+    return statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.95)]
+
+
+if __name__ == "__main__":
+    documents, chunks_per_document = 500, 40
+    rows = _synthetic_chunks(documents, chunks_per_document)
+    print(f"📦 {len(rows):,} chunks across {documents} documents")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, optimized in (("before", False), ("after", True)):
+            database = os.path.join(tmp, f"{label}.db")
+            rate = _bench_ingest(database, rows, optimized)
+            p50, p95 = _bench_lookup(database, documents, optimized)
+            print(
+                f"   {label:6} | ingest {rate:,.0f} rows/s | "
+                f"lookup p50 {p50 * 1000:.3f} ms, p95 {p95 * 1000:.3f} ms"
+            )
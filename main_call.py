@@ -3,6 +3,7 @@ import sqlite3
 import json
 from langchain.prompts import ChatPromptTemplate
 from langchain_ollama import OllamaLLM
+from model_loader import get_model
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import sys
@@ -10,16 +11,20 @@ import time
 from db_setup import chunk_text
 # ---- STEP 1: PDF PROCESSING ----
 from extract_text import extract_text_from_file
-from db_setup import extract_and_store_chunks
+from db_setup import extract_and_store_chunks, init_document_files_table, insert_chunks
+from tfidf_index import build_tfidf_index
+from vector_index import build_vector_index
+from context_builder import build_context, count_tokens
+from answer_cache import invalidate_answers
+from retrieval import query_chunks
+from kb_store import connect
 
 import hashlib
 
 DATABASE = 'embeddings_metadata.db'
 
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return connect(DATABASE)
 
 
 def generate_document_hash(document_name, content):
@@ -29,33 +34,105 @@ def generate_document_hash(document_name, content):
     hasher.update(content.encode('utf-8'))
     return hasher.hexdigest()
 
-def process_pdf(pdf_path, db_conn, document_id):
+
+def file_hash(file_path):
+    """Generate SHA256 hash for a file."""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# Per-process cache of resolved documents: absolute path -> (size, mtime_ns, document_id)
+_document_cache = {}
+
+
+def _ingest_document(db_conn, file_path):
+    """Resolve a file by its extracted-content hash, processing it if it is a new document."""
+    extracted_text = extract_text_from_file(file_path)
+    document_hash = generate_document_hash(os.path.basename(file_path), extracted_text)
+
+    cursor = db_conn.cursor()
+    cursor.execute("SELECT id FROM documents WHERE document_hash = ?", (document_hash,))
+    existing_document = cursor.fetchone()
+    if existing_document:
+        print("✅ Document already exists. Fetching chunks directly from the database.")
+        return existing_document[0]
+
+    print("📄 Processing new document...")
+    cursor.execute(
+        "INSERT INTO documents (name, document_hash) VALUES (?, ?)",
+        (os.path.basename(file_path), document_hash)
+    )
+    document_id = cursor.lastrowid
+    process_pdf(file_path, db_conn, document_id, extracted_text)
+    db_conn.commit()
+    return document_id
+
+
+def resolve_document(db_conn, file_path):
+    """Return the document id for a file, ingesting it first if it is new.
+
+    A (size, mtime) fingerprint cached per process and in document_files decides
+    identity; file_hash() is only computed when the fingerprint changes, and the
+    file is only parsed when its hash has never been seen.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    fingerprint = (stat.st_size, stat.st_mtime_ns)
+
+    cached = _document_cache.get(path)
+    if cached is not None and cached[:2] == fingerprint:
+        return cached[2]
+
+    init_document_files_table(db_conn)
+    cursor = db_conn.cursor()
+    cursor.execute("SELECT document_id, size, mtime_ns FROM document_files WHERE path = ?", (path,))
+    row = cursor.fetchone()
+
+    if row is not None and (row[1], row[2]) == fingerprint:
+        document_id = row[0]
+    else:
+        digest = file_hash(path)
+        cursor.execute("SELECT document_id FROM document_files WHERE file_hash = ?", (digest,))
+        row = cursor.fetchone()
+        document_id = row[0] if row is not None else _ingest_document(db_conn, path)
+        cursor.execute(
+            "INSERT OR REPLACE INTO document_files (path, document_id, size, mtime_ns, file_hash) VALUES (?, ?, ?, ?, ?)",
+            (path, document_id, stat.st_size, stat.st_mtime_ns, digest)
+        )
+        db_conn.commit()
+
+    _document_cache[path] = fingerprint + (document_id,)
+    return document_id
+
+
+def process_pdf(pdf_path, db_conn, document_id, extracted_text=None):
     """Extract text from PDF, chunk it, and store it in the database with document_id."""
     if not os.path.exists(pdf_path):
         print(f"❌ Error: PDF file '{pdf_path}' not found.")
         return
     
-    print("📄 Extracting text from PDF...")
-    extracted_text = extract_text_from_file(pdf_path)
+    if extracted_text is None:
+        print("📄 Extracting text from PDF...")
+        extracted_text = extract_text_from_file(pdf_path)
     
     print("🔄 Chunking text and storing in database...")
     chunks = chunk_text(extracted_text, max_tokens=500, overlap=50)
     
-    cursor = db_conn.cursor()
-    for chunk in chunks:
-        cursor.execute(
-            "INSERT INTO chunks (document_id, chunk) VALUES (?, ?)",
-            (document_id, chunk)
-        )
+    insert_chunks(db_conn, document_id, chunks)
     db_conn.commit()
+    build_tfidf_index(db_conn, document_id)
+    build_vector_index(db_conn, document_id)
+    invalidate_answers(document_id)
     print("✅ PDF processing complete: Text extracted, chunked, and stored in DB.")
 
 
 # ---- STEP 2: LOAD LANGUAGE MODEL ----
 def load_model(model_name: str):
-    """Load the language model."""
-    print(f"🤖 Loading model: {model_name}")
-    return OllamaLLM(model=model_name)
+    """Return the shared, process-wide client for the language model."""
+    return get_model(model_name)
 
 
 # ---- STEP 3: RETRIEVE AND RANK CHUNKS ----
@@ -89,11 +166,7 @@ def rank_chunks_by_similarity(query_text, chunks, top_k=5):
 
 
 # ---- STEP 4: HANDLE PROMPT WITH MODEL (Streaming Enabled) ----
-def handle_prompt(query_text: str, context_text: str, model, temperature: float, top_p: float, max_length: int):
-    """
-    Handle the query and generate the full response before returning it. 
-    """
-    PROMPT_TEMPLATE = """
+CONTEXT_PROMPT_TEMPLATE = """
     Answer the question based only on the following context in a concise manner.**If Query answer is out of context then display "Invalid Question"** .Dont give Extra text such as "According to Context", Just give accurate and necessary response. :
 
     {context}
@@ -105,8 +178,21 @@ def handle_prompt(query_text: str, context_text: str, model, temperature: float,
     - If the context does not mention anything related to the question, respond only with below text andDo not attempt to generate an answer beyond the provided context.:  
     **"Invalid Question"**  
     """
-    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+
+
+def build_context_prompt(query_text: str, context_text: str):
+    """Format the context-grounded question prompt."""
+    prompt_template = ChatPromptTemplate.from_template(CONTEXT_PROMPT_TEMPLATE)
     prompt = prompt_template.format(context=context_text, question=query_text)
+    print(f"🧮 Prompt size: ~{count_tokens(prompt)} tokens")
+    return prompt
+
+
+def handle_prompt(query_text: str, context_text: str, model, temperature: float, top_p: float, max_length: int):
+    """
+    Handle the query and generate the full response before returning it. 
+    """
+    prompt = build_context_prompt(query_text, context_text)
     print("📝 Generating full response...\n")
 
     # Generate full response at once
@@ -118,6 +204,35 @@ def handle_prompt(query_text: str, context_text: str, model, temperature: float,
     return response_text
 
 
+def stream_prompt(query_text: str, context_text: str, model, temperature: float, top_p: float, max_length: int):
+    """
+    Handle the query and yield the response text as the model produces it.
+    """
+    prompt = build_context_prompt(query_text, context_text)
+    print("📝 Streaming response...\n")
+
+    for token in model.stream(prompt, temperature=temperature, top_p=top_p, max_length=max_length):
+        yield token
+
+
+async def ahandle_prompt(query_text: str, context_text: str, model, temperature: float, top_p: float, max_length: int):
+    """
+    Async variant of handle_prompt() that awaits the model over HTTP instead of blocking a thread.
+    """
+    prompt = build_context_prompt(query_text, context_text)
+    llm_result = await model.agenerate([prompt], temperature=temperature, top_p=top_p, max_length=max_length)
+    return llm_result.generations[0][0].text
+
+
+async def astream_prompt(query_text: str, context_text: str, model, temperature: float, top_p: float, max_length: int):
+    """
+    Async variant of stream_prompt().
+    """
+    prompt = build_context_prompt(query_text, context_text)
+    async for token in model.astream(prompt, temperature=temperature, top_p=top_p, max_length=max_length):
+        yield token
+
+
 
 def handle_general_prompt(query_text: str, model, temperature: float, top_p: float, max_length: int):
     """
@@ -157,36 +272,17 @@ def main():
     if mode == '1':
         # --- File Upload ---
         file_path = input("📂 Enter the path to your file (PDF, DOCX): ").strip()
-        extracted_text = extract_text_from_file(file_path)
-        document_hash = generate_document_hash(os.path.basename(file_path), extracted_text)
-        
-        cursor = db_conn.cursor()
-        cursor.execute("SELECT id FROM documents WHERE document_hash = ?", (document_hash,))
-        existing_document = cursor.fetchone()
-        
-        if existing_document:
-            document_id = existing_document['id']
-            print("✅ Document already exists. Fetching chunks directly from the database.")
-        else:
-            print("📄 Processing new document...")
-            cursor.execute(
-                "INSERT INTO documents (name, document_hash) VALUES (?, ?)",
-                (os.path.basename(file_path), document_hash)
-            )
-            document_id = cursor.lastrowid
-            process_pdf(file_path, db_conn, document_id)
-            db_conn.commit()
+        document_id = resolve_document(db_conn, file_path)
         
         # --- User Query ---
         query_text = input("\n💬 Enter your question: ").strip()
-        chunks = fetch_all_chunks(db_conn)
-        ranked_chunks = rank_chunks_by_similarity(query_text, chunks, top_k=5)
+        ranked_chunks = query_chunks(db_conn, document_id, query_text, top_k=5)
         
         if not ranked_chunks:
             print("⚠️ No relevant chunks found. Please refine your question.")
             return
         
-        context_text = " ".join(ranked_chunks)
+        context_text, _ = build_context(query_text, ranked_chunks)
         handle_prompt(query_text, context_text, model, temperature, top_p, max_length)
     
     elif mode == '2':
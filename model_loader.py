@@ -1,13 +1,73 @@
+import os
+import threading
+import time
 from langchain_ollama import OllamaLLM
 
 DEFAULT_MODEL_NAME = "llama3.1"
 
+# How long Ollama keeps the model in memory after the last request
+# (duration string such as "30m", or "-1" to never unload it).
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Process-wide clients, one per model name; reusing them keeps their HTTP connections alive.
+_models = {}
+_lock = threading.Lock()
+
+# Warmup state per model name: {"ready": bool, "seconds": float, "error": str}
+warmup_status = {}
+
+
+def get_model(model_name=DEFAULT_MODEL_NAME):
+    """
+    Return the shared client for a model, creating it on first use.
+    """
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            model = OllamaLLM(model=model_name, keep_alive=OLLAMA_KEEP_ALIVE)
+            _models[model_name] = model
+        return model
+
+
+def warmup_model(model_name=DEFAULT_MODEL_NAME):
+    """
+    Send a one-token request so Ollama loads the model before the first user query.
+    """
+    warmup_status[model_name] = {"ready": False, "seconds": None, "error": None}
+    start = time.perf_counter()
+    try:
+        get_model(model_name).invoke("Hi", options={"num_predict": 1})
+        elapsed = round(time.perf_counter() - start, 3)
+        warmup_status[model_name] = {"ready": True, "seconds": elapsed, "error": None}
+        print(f"✅ Model '{model_name}' warmed up in {elapsed}s.")
+    except Exception as e:
+        warmup_status[model_name] = {"ready": False, "seconds": None, "error": str(e)}
+        print(f"❌ Failed to warm up model '{model_name}': {e}")
+
+
+def start_warmup(model_name=DEFAULT_MODEL_NAME):
+    """
+    Warm the model up in a background thread so server startup is not blocked.
+    """
+    warmup_status.setdefault(model_name, {"ready": False, "seconds": None, "error": None})
+    threading.Thread(target=warmup_model, args=(model_name,), daemon=True).start()
+
+
+def readiness(model_name=DEFAULT_MODEL_NAME):
+    """
+    Return the readiness payload and HTTP status for a /ready endpoint.
+    """
+    status = warmup_status.get(model_name, {"ready": False, "seconds": None, "error": None})
+    payload = dict(status, model=model_name, keep_alive=OLLAMA_KEEP_ALIVE)
+    return payload, 200 if status["ready"] else 503
+
+
 def load_default_model():
     """
     Load the default model when the app starts.
     """
     try:
-        model = OllamaLLM(model=DEFAULT_MODEL_NAME)
+        model = get_model(DEFAULT_MODEL_NAME)
         print(f"✅ Default model '{DEFAULT_MODEL_NAME}' loaded successfully.")
         return model
     except Exception as e:
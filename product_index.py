@@ -0,0 +1,201 @@
+import copy
+import random
+import time
+import numpy as np
+
+VALID_CATEGORIES = {"mens collection", "women collection", "kids collection"}
+
+
+def _encode_bitsets(values_per_row, n):
+    """Integer-code multi-valued columns and pack them into uint64 bitsets.
+
+    Returns the value -> code mapping and an array of shape (n_words, n) where
+    bit ``code % 64`` of word ``code // 64`` is set when the row holds the value.
+    """
+    codes = {}
+    rows, cols = [], []
+    for i, values in enumerate(values_per_row):
+        for value in values:
+            rows.append(i)
+            cols.append(codes.setdefault(value, len(codes)))
+
+    n_words = max(1, (len(codes) + 63) // 64)
+    bits = np.zeros((n_words, n), dtype=np.uint64)
+    if rows:
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        np.bitwise_or.at(bits, (cols >> 6, rows), np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64)))
+    return codes, bits
+
+
+def _bitset_mask(codes, bits, value):
+    """Vectorized membership test of `value` against a bitset column."""
+    code = codes.get(value)
+    if code is None:
+        return np.zeros(bits.shape[1], dtype=bool)
+    return (bits[code >> 6] & np.uint64(1 << (code & 63))) != 0
+
+
+def _as_number(value):
+    """Return `value` as a float if it is a usable price bound, else None."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_product_index(products):
+    """Build a columnar index over transformed products for vectorized filtering."""
+    n = len(products)
+    price = np.full(n, np.nan, dtype=np.float64)
+    brand = np.empty(n, dtype=np.int32)
+    brand_codes = {}
+
+    for i, product in enumerate(products):
+        product_price = product.get("price")
+        if isinstance(product_price, (int, float)) and not isinstance(product_price, bool):
+            price[i] = product_price
+        product_brand = (product.get("brand") or "").lower()
+        brand[i] = brand_codes.setdefault(product_brand, len(brand_codes))
+
+    category_codes, category_bits = _encode_bitsets(
+        ({cat.lower().strip() for cat in p.get("category", []) if isinstance(cat, str)} for p in products), n
+    )
+    size_codes, size_bits = _encode_bitsets((set(p.get("available_sizes", [])) for p in products), n)
+
+    return {
+        "products": products,
+        "price": price,
+        "brand": brand,
+        "brand_codes": brand_codes,
+        "category_bits": category_bits,
+        "category_codes": category_codes,
+        "size_bits": size_bits,
+        "size_codes": size_codes
+    }
+
+
+def filter_product_index(index, filters):
+    """Evaluate brand/category/price/size filters as vectorized masks and materialize the matches.
+
+    Products without a numeric price are not excluded by price bounds. The
+    returned dicts are shared with the index and must not be mutated.
+    """
+    products = index["products"]
+    mask = np.ones(len(products), dtype=bool)
+    active = False
+
+    brand_filter = filters.get("brand")
+    if brand_filter not in [None, "null", ""]:
+        active = True
+        code = index["brand_codes"].get(str(brand_filter).lower())
+        if code is None:
+            return []
+        mask &= index["brand"] == code
+
+    category_filter = filters.get("category")
+    if isinstance(category_filter, str) and category_filter.lower() in VALID_CATEGORIES:
+        active = True
+        mask &= _bitset_mask(index["category_codes"], index["category_bits"], category_filter.lower())
+
+    min_price = _as_number(filters.get("min_price"))
+    max_price = _as_number(filters.get("max_price"))
+    if min_price is not None or max_price is not None:
+        active = True
+        price = index["price"]
+        unpriced = np.isnan(price)
+        if min_price is not None:
+            mask &= unpriced | (price >= min_price)
+        if max_price is not None:
+            mask &= unpriced | (price <= max_price)
+
+    size_filter = filters.get("size")
+    if isinstance(size_filter, int) and not isinstance(size_filter, bool):
+        active = True
+        mask &= _bitset_mask(index["size_codes"], index["size_bits"], size_filter)
+
+    if not active:
+        return []
+
+    return [products[i] for i in np.flatnonzero(mask)]
+
+
+# ---- BENCHMARK ----
+def _scan_filter(product_data, filters):
+    """Row-by-row reference filter mirroring the previous filter_products() loop."""
+    product_data = copy.deepcopy(product_data)
+    brand_filter = filters.get("brand")
+    brand_filter = None if brand_filter in [None, "null"] else brand_filter.lower()
+    min_price = filters.get("min_price")
+    max_price = filters.get("max_price")
+    category_filter = filters.get("category")
+    category_filter = category_filter.lower() if category_filter and category_filter.lower() in VALID_CATEGORIES else None
+
+    filtered_list = []
+    for product in product_data:
+        if brand_filter and (product.get("brand") or "").lower() != brand_filter:
+            continue
+        product_price = product.get("price")
+        if isinstance(product_price, (int, float)):
+            if min_price is not None and product_price < min_price:
+                continue
+            if max_price is not None and product_price > max_price:
+                continue
+        if category_filter:
+            product_categories = {cat.lower().strip() for cat in product.get("category", []) if isinstance(cat, str)}
+            if category_filter not in product_categories:
+                continue
+        filtered_list.append(product)
+    return copy.deepcopy(filtered_list)
+
+
+def _synthetic_products(n, seed=7):
+    rng = random.Random(seed)
+    brands = ["Nike", "Adidas", "Reebok", "Puma", "Converse", "SK", "ARF", "Bata", "Servis", "Skechers"]
+    categories = ["Mens Collection", "Women Collection", "Kids Collection", "Sneakers", "Formal", "Running"]
+    return [
+        {
+            "product_id": i,
+            "name": f"Product {i}",
+            "price": rng.randrange(1000, 30000, 50),
+            "category": rng.sample(categories, rng.randint(1, 3)),
+            "brand": rng.choice(brands),
+            "available_sizes": sorted(rng.sample(range(30, 47), rng.randint(1, 8)))
+        }
+        for i in range(n)
+    ]
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    queries = [
+        {"brand": "Nike", "min_price": None, "max_price": None, "category": None},
+        {"brand": None, "min_price": 5000, "max_price": 15000, "category": "Mens Collection"},
+        {"brand": "adidas", "min_price": None, "max_price": 8000, "category": "Kids Collection"},
+        {"brand": "Puma", "min_price": 20000, "max_price": None, "category": "Women Collection"},
+    ]
+
+    for n in (1_000, 10_000, 100_000):
+        products = _synthetic_products(n)
+        build_seconds, index = _time(lambda: build_product_index(products), 1)
+        print(f"📦 {n:,} products — index built in {build_seconds * 1000:.1f} ms")
+
+        for filters in queries:
+            scan_seconds, expected = _time(lambda: _scan_filter(products, filters), 1 if n >= 100_000 else 3)
+            index_seconds, result = _time(lambda: filter_product_index(index, filters), 20)
+            assert [p["product_id"] for p in result] == [p["product_id"] for p in expected]
+            print(
+                f"   {filters} -> {len(result):,} rows | "
+                f"scan {scan_seconds * 1000:.2f} ms | index {index_seconds * 1000:.3f} ms | "
+                f"{scan_seconds / index_seconds:.0f}x"
+            )
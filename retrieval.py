@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import threading
+from fts_index import query_fts_index
+from tfidf_index import query_tfidf_index
+from vector_index import query_vector_index
+
+# Knowledge-base retrieval backend: "tfidf" (per-document TF-IDF index),
+# "fts5" (BM25 over the SQLite full-text index) or "vector" (dense embeddings).
+RETRIEVAL_BACKEND = os.environ.get("RETRIEVAL_BACKEND", "tfidf").lower()
+
+RETRIEVERS = {
+    "tfidf": query_tfidf_index,
+    "fts5": query_fts_index,
+    "vector": query_vector_index
+}
+
+_lock = threading.Lock()
+
+retrieval_stats = {
+    name: {"queries": 0, "empty": 0, "total_seconds": 0.0, "avg_ms": None}
+    for name in RETRIEVERS
+}
+
+
+def query_chunks(db_conn, document_id, query_text, top_k=5, backend=None):
+    """Return the document's top-k chunks for the query using the configured backend."""
+    backend = (backend or RETRIEVAL_BACKEND).lower()
+    if backend not in RETRIEVERS:
+        print(f"❌ Unknown retrieval backend '{backend}', using tfidf")
+        backend = "tfidf"
+
+    start = time.perf_counter()
+    chunks = RETRIEVERS[backend](db_conn, document_id, query_text, top_k=top_k)
+    elapsed = time.perf_counter() - start
+
+    with _lock:
+        stats = retrieval_stats[backend]
+        stats["queries"] += 1
+        stats["empty"] += not chunks
+        stats["total_seconds"] += elapsed
+        stats["avg_ms"] = round(stats["total_seconds"] / stats["queries"] * 1000, 3)
+    return chunks
+
+
+# ---- COMPARISON ----
+if __name__ == "__main__":
+    from kb_store import connect
+    from main_call import resolve_document
+
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "knowledge_base.pdf"
+    queries = sys.argv[2:] or [
+        "What is the return policy?",
+        "How long does delivery take?",
+        "Can I exchange shoes for a different size?",
+        "Which payment methods do you accept?",
+        "How do I track my order?"
+    ]
+
+    db_conn = connect()
+    document_id = resolve_document(db_conn, pdf_path)
+    for query in queries:
+        results = {}
+        for backend in RETRIEVERS:
+            query_chunks(db_conn, document_id, query, backend=backend)     # warm caches
+            start = time.perf_counter()
+            results[backend] = query_chunks(db_conn, document_id, query, backend=backend)
+            results[backend + "_ms"] = (time.perf_counter() - start) * 1000
+        print(f"🔎 {query}")
+        for backend in RETRIEVERS:
+            overlap = len(set(results["tfidf"]) & set(results[backend]))
+            print(
+                f"   {backend:6} {results[backend + '_ms']:.2f} ms | top-5 overlap with tfidf {overlap}/5 | "
+                f"top-1 agree {results['tfidf'][:1] == results[backend][:1]}"
+            )
+    db_conn.close()
@@ -5,13 +5,17 @@ import json
 import re
 from flask_cors import CORS
 from langchain_ollama import OllamaLLM
+from model_loader import get_model, start_warmup, readiness
 from langchain_core.prompts import ChatPromptTemplate
-import copy
 from flask import Flask, request, jsonify
-from main_call import process_pdf, load_model, handle_prompt, rank_chunks_by_similarity, extract_text_from_file, generate_document_hash,handle_general_prompt
+from main_call import process_pdf, load_model, handle_prompt, rank_chunks_by_similarity, extract_text_from_file, generate_document_hash,handle_general_prompt, resolve_document, build_context
+from retrieval import query_chunks
 import sqlite3
 import hashlib
 import os
+from kb_store import pooled_connection
+from catalog_cache import get_product_data, catalog_stats
+from product_index import build_product_index, filter_product_index
 app = Flask(__name__)
 CORS(app)
 
@@ -20,20 +24,10 @@ DATABASE = 'embeddings_metadata.db'
 
 # --- Utility Functions ---
 def get_db_connection():
-    """Establish and return a database connection."""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Borrow a knowledge-base connection from the shared pool; use as `with get_db_connection() as conn:`."""
+    return pooled_connection(DATABASE)
 
 
-def file_hash(file_path):
-    """Generate SHA256 hash for a file."""
-    hasher = hashlib.sha256()
-    with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
-
 # Database Configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -47,7 +41,7 @@ DB_CONFIG = {
 connection_pool = None
 
 # Load LLM Model
-model = OllamaLLM(model="llama3.1")
+model = get_model("llama3.1")
 
 def create_connection_pool():
     """Creates a MySQL connection pool."""
@@ -181,71 +175,12 @@ def transform_product_data(raw_product_data):
     return transformed_data
 
 
+def load_catalog():
+    """Fetches and transforms the product catalog and builds its columnar filter index."""
+    product_data = transform_product_data(fetch_products())
+    product_data["index"] = build_product_index(product_data["products"])
+    return product_data
 
-import copy
-
-import copy
-
-def filter_products(product_data, filters):
-    """Filters products based on the given filter criteria."""
-    
-    # Make a deep copy of product_data to prevent unintended modifications
-    product_data = copy.deepcopy(product_data)
-
-    brand_filter = filters.get("brand")
-    brand_filter = None if brand_filter in [None, "null"] else brand_filter.lower()
-    min_price = filters.get("min_price")
-    max_price = filters.get("max_price")
-
-    category_filter = filters.get("category")
-    print("Filter Value Before:", category_filter)
-
-    # Define valid categories in lowercase
-    valid_categories = {"mens collection", "women collection", "kids collection"}
-
-    # Normalize category if valid, otherwise set to None
-    if category_filter and category_filter.lower() in valid_categories:
-        category_filter = category_filter.lower()
-    else:
-        category_filter = None  # Ignore invalid categories
-
-    print("Filter Value After:", brand_filter)
-
-    filtered_list = []
-    if brand_filter or  category_filter or  min_price and not max_price:
-        print("All filters are empty.")
-        response = "Please provide at least one filter to proceed."
-        for product in product_data:
-            if not isinstance(product, dict):
-                print(f"❌ Skipping invalid product entry: {product}")
-                continue
-
-            # Apply brand filter if specified
-            if brand_filter:
-                product_brand = product.get("brand", "").lower()
-                if product_brand != brand_filter:
-                    continue
-
-            # Apply price filter if specified
-            if isinstance(min_price, (int, float)) or isinstance(max_price, (int, float)):
-                product_price = product.get("price")
-                if isinstance(product_price, (int, float)):  # Ensure product has a valid price
-                    if min_price is not None and product_price < min_price:
-                        continue
-                    if max_price is not None and product_price > max_price:
-                        continue
-
-            # Apply category filter only if it is valid
-            if category_filter:
-                product_categories = {cat.lower().strip() for cat in product.get("category", []) if isinstance(cat, str)}
-                print(f"Checking product: {product['name']} | Categories: {product_categories}")  # Debugging
-                if category_filter not in product_categories:
-                    continue
-
-            filtered_list.append(product)
-
-    print("🔍 Debugging: Filtered Products =", filtered_list)
-    return copy.deepcopy(filtered_list)
 
 
 def generate_response(query_text, filtered_products, filters):
@@ -268,51 +203,21 @@ def process_pdf_and_ask(pdf_path, query):
     if not query:
         return {"error": "Missing 'question' parameter."}, 400
     
-    # Extract text for hashing
-    extracted_text = extract_text_from_file(pdf_path)
-    document_hash = generate_document_hash(os.path.basename(pdf_path), extracted_text)
-    
-    # Database Connection
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Check if the document already exists
-    cursor.execute("SELECT id FROM documents WHERE document_hash = ?", (document_hash,))
-    existing_document = cursor.fetchone()
-    
-    if existing_document:
-        document_id = existing_document['id']
-        print("✅ Document already exists. Fetching chunks directly from the database.")
-    else:
-        print("📄 Processing new document...")
-
-        # Insert document metadata
-        cursor.execute(
-            "INSERT INTO documents (name, document_hash) VALUES (?, ?)",
-            (os.path.basename(pdf_path), document_hash)
-        )
-        document_id = cursor.lastrowid
-
-        # Process and store chunks
-        process_pdf(pdf_path, conn, document_id)
-        conn.commit()
-    
-    # Fetch chunks related to this document
-    cursor.execute("SELECT chunk FROM chunks WHERE document_id = ?", (document_id,))
-    chunks = [row['chunk'] for row in cursor.fetchall()]
+    with get_db_connection() as conn:
+        # Resolve the document from its file fingerprint (ingesting it only if new)
+        document_id = resolve_document(conn, pdf_path)
+        
+        # Rank chunks with the configured retrieval backend (TF-IDF, FTS5 BM25 or vectors)
+        ranked_chunks = query_chunks(conn, document_id, query, top_k=5)
     
-    if not chunks:
-        conn.close()
+    if not ranked_chunks:
         return {"error": "No chunks found for this document."}, 404
     
-    # Rank chunks and generate a response
-    ranked_chunks = rank_chunks_by_similarity(query, chunks, top_k=5)
-    context_text = " ".join(ranked_chunks)
+    # Generate a response
+    context_text, _ = build_context(query, ranked_chunks)
     
     model = load_model("llama3.1")
     response = handle_prompt(query, context_text, model, 0.7, 0.9, 300)
-    
-    conn.close()
 
     # Ensure response is formatted correctly for frontend display
     print("FYP response",  response)
@@ -341,9 +246,8 @@ def chat():
     if not user_query:
         return jsonify({"error": "Query cannot be empty"}), 400
 
-    # ✅ Fetch and transform fresh product data
-    raw_product_data = fetch_products()
-    product_data = transform_product_data(raw_product_data)
+    # ✅ Product data is served from the in-process catalog cache
+    product_data = get_product_data(connection_pool, load_catalog)
     
     print("🔍 Debugging: Transformed Data =", product_data)
     if not product_data["products"]:
@@ -354,7 +258,7 @@ def chat():
     if any(value not in [None, "null", ""] for value in filters.values()):
         print("✅ At least one filter value is valid:", filters)
             # ✅ Step 2: Filter products using extracted filters
-        filtered_products = filter_products(copy.deepcopy(product_data["products"]), filters)  # Copy to ensure fresh filtering
+        filtered_products = filter_product_index(product_data["index"], filters)
         
         print("🔍 Debugging: Filtered Products =", filtered_products)
         if not filtered_products:  # This checks for both None and an empty list
@@ -364,19 +268,33 @@ def chat():
             response = generate_response(user_query, filtered_products, filters)
 
         # ✅ Explicitly clear variables before returning (Garbage Collection)
-        del raw_product_data, product_data, filtered_products, filters
+        del product_data, filtered_products, filters
     else:
         print("⚠️ All filter values are null or empty:", filters)
         response = process_pdf_and_ask("knowledge_base.pdf", user_query)
     return jsonify({"response": response})
 
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Reports catalog cache counters."""
+    return jsonify({"catalog": catalog_stats})
+
+
+
+
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the model warmup request has completed, 503 before."""
+    payload, status = readiness()
+    return jsonify(payload), status
 
 
 if __name__ == '__main__':
     create_connection_pool()
     if connection_pool:
+        start_warmup("llama3.1")
         app.run(debug=True, port=5000)
     else:
         print("Failed to create connection pool. Server not started.")
@@ -0,0 +1,13 @@
+import json
+
+# Disable caching and proxy buffering so events reach the browser as they are produced.
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def format_sse(data, event=None):
+    """Format one server-sent event carrying a JSON payload."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
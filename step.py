@@ -1,8 +1,15 @@
-import pandas as pd
 import json
+import os
 import re
+import hashlib
+import threading
+import time
 import mysql.connector
 from mysql.connector import Error, pooling
+from catalog_cache import fetch_catalog_version
+from brand_matcher import get_matcher
+from trend_stream import iter_posts, ranked_scores
+from trend_scoring import aggregate_trend_scores, calculate_trend_score
 
 # Database configuration
 DB_CONFIG = {
@@ -15,6 +22,20 @@ DB_CONFIG = {
 
 connection_pool = None
 
+TREND_FILE = "final.json"
+
+# Memoized final_func() result, keyed by (trend file digest, catalog version)
+_final_lock = threading.Lock()
+_final_key = None
+_final_result = None
+_trend_digests = {}   # path -> (size, mtime_ns, digest)
+
+final_func_stats = {
+    "hits": 0,
+    "misses": 0,
+    "last_compute_seconds": None
+}
+
 def create_connection_pool():
     """Create a database connection pool."""
     global connection_pool
@@ -90,105 +111,113 @@ def fetch_products():
         cursor.close()
         connection.close()
 
-def calculate_trend_score(likes, shares, comments, views):
-    """Calculate trend score based on engagement metrics."""
-    return (likes * 0.4) + (shares * 0.3) + (comments * 0.2) + (views * 0.1)
-
 def fetch_brands_and_process_social_data(raw_data):
-    """Fetch brands and process social media data to compute trend scores."""
+    """Fetch brands and compute per-(brand, category) trend scores from an iterable of posts.
+
+    Matched posts are scored in vectorized batches and summed as they stream
+    past, so `raw_data` can be a generator over a dump of any size.
+    """
     known_brands = fetch_brands()
     categories = ["Men", "Women", "Kids"]
+    matcher = get_matcher(tuple(known_brands), tuple(categories))
     
-    processed_data = []
-    for item in raw_data:
-        text = item.get("caption") or item.get("message") or item.get("text", "")
-        brand = next((b for b in known_brands if re.search(rf'\b{b}\b', text, re.IGNORECASE)), None)
-        category = next((c for c in categories if re.search(rf'\b{c}\b', text, re.IGNORECASE)), None)
-        
-        if brand and category:
-            likes = int(item.get("like_count") or item.get("likes", 0))
-            shares = int(item.get("shares", 0))
-            comments = int(item.get("comments_count") or item.get("comments", 0))
-            views = int(item.get("impressions") or item.get("views", 0))
-            
-            trend_score = calculate_trend_score(likes, shares, comments, views)
-            
-            processed_data.append({
-                "brand": brand,
-                "category": category,
-                "trend_score": trend_score
-            })
-    
-    df = pd.DataFrame(processed_data)
-    
-    if df.empty:
-        return []
+    return ranked_scores(aggregate_trend_scores(raw_data, matcher))
 
-    brand_category_scores = (
-        df.groupby(['brand', 'category'])['trend_score']
-        .sum()
-        .reset_index()
-        .sort_values(by='trend_score', ascending=False)
-    )
-    
-    return brand_category_scores.to_dict(orient='records')
+CATEGORY_MAPPING = {
+    "Mens Collection": "Men",
+    "Women Collection": "Women",
+    "Kids Collection": "Kids"
+}
 
-import json
+# Products kept per (brand, category) trend group
+PRODUCTS_PER_GROUP = 3
 
 def normalize_category(category):
     """Convert product categories to match trend category names."""
-    category_mapping = {
-        "Mens Collection": "Men",
-        "Women Collection": "Women",
-        "Kids Collection": "Kids"
-    }
-    return category_mapping.get(category, category)  # Default to original if no match
+    return CATEGORY_MAPPING.get(category, category)  # Default to original if no match
+
+def group_products(product_data, limit=PRODUCTS_PER_GROUP):
+    """Bucket products by (brand, normalized category), keeping the first `limit` of each in catalog order."""
+    groups = {}
+    for product in product_data:
+        bucket = groups.setdefault((product["brand"], normalize_category(product["category"])), [])
+        if len(bucket) < limit:
+            bucket.append(product)
+    return groups
 
 def match_products_with_scores(product_data, brand_category_scores):
-    """Match products with the highest brand-category scores and return top 3 products."""
+    """Join products to their brand-category trend scores and return them as compact JSON, highest score first."""
+    # One pass over the products, then one dict lookup per score row
+    groups = group_products(product_data)
     matched_products = []
 
     for score_entry in brand_category_scores:
-        brand = score_entry["brand"]
-        category = score_entry["category"]
-        trend_score = score_entry["trend_score"]
-        
-        # Normalize categories for comparison
-        matching_products = [
-            p for p in product_data if p["brand"] == brand and normalize_category(p["category"]) == category
-        ]
-
-        # Sort products within this brand-category combination and take top 3
-        top_products = matching_products[:3]
-
-        for product in top_products:
+        for product in groups.get((score_entry["brand"], score_entry["category"]), ()):
             matched_products.append({
                 "product_name": product["product_name"],
                 "brand": product["brand"],
                 "category": product["category"],
-                "trend_score": trend_score
+                "trend_score": score_entry["trend_score"]
             })
 
-    # Sort globally by trend_score and return the top 3
-    matched_products = sorted(matched_products, key=lambda x: x["trend_score"], reverse=True)
-
-    return json.dumps(matched_products, indent=4)
+    # Sort globally by trend_score
+    matched_products.sort(key=lambda x: x["trend_score"], reverse=True)
 
+    return json.dumps(matched_products, separators=(",", ":"), ensure_ascii=False)
 
-def final_func():
-        
-    json_file = "final.json"
 
-    # Load the JSON data from the file
+def trend_file_digest(json_file):
+    """SHA-256 of the trend file, only re-hashed when its size or mtime changes."""
     try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            trend_data = json.load(f)
-    except Exception as e:
-        print(f"❌ Error loading JSON file: {e}")
-        trend_data = []
+        stat = os.stat(json_file)
+    except OSError:
+        return None
+
+    cached = _trend_digests.get(json_file)
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+
+    hasher = hashlib.sha256()
+    with open(json_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+    _trend_digests[json_file] = (stat.st_size, stat.st_mtime_ns, digest)
+    return digest
+
+def final_func(json_file=TREND_FILE):
+    """Return the ad-placement ranking, recomputed only when the trend file or the catalog changes."""
+    global _final_key, _final_result
+
+    with _final_lock:
+        digest = trend_file_digest(json_file)
+        version = fetch_catalog_version(connection_pool)
+
+        # An unreachable catalog keeps serving the last result computed from the same trend file
+        if _final_result is not None and _final_key[0] == digest and version in (None, _final_key[1]):
+            final_func_stats["hits"] += 1
+            return _final_result
+
+        final_func_stats["misses"] += 1
+        start = time.perf_counter()
+        result = compute_final(json_file)
+        elapsed = time.perf_counter() - start
+        final_func_stats["last_compute_seconds"] = round(elapsed, 4)
+        print(f"🔄 Ad-placement analysis recomputed in {elapsed:.3f}s")
+
+        if version is not None:
+            _final_key, _final_result = (digest, version), result
+        return result
+
+def compute_final(json_file=TREND_FILE):
+    """Compute the ad-placement ranking from the trend file and the live catalog."""
     product_data = fetch_products()
-    # Process social data to get brand-category scores
-    brand_category_scores = fetch_brands_and_process_social_data(trend_data)
+    # Stream the social data to get brand-category scores
+    try:
+        brand_category_scores = fetch_brands_and_process_social_data(iter_posts(json_file))
+    except (OSError, ValueError) as e:
+        print(f"❌ Error loading JSON file: {e}")
+        brand_category_scores = []
     result = match_products_with_scores(product_data, brand_category_scores)
 
     return result
@@ -200,22 +229,8 @@ create_connection_pool()
 
 
 if __name__ == "__main__":
-    json_file = "final.json"
-
-    # Load the JSON data from the file
-    try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            trend_data = json.load(f)
-    except Exception as e:
-        print(f"❌ Error loading JSON file: {e}")
-        trend_data = []
-
-    # Fetch product data
-    product_data = fetch_products()
-    # Process social data to get brand-category scores
-    brand_category_scores = fetch_brands_and_process_social_data(trend_data)
-    # Match top 3 products
-    result = match_products_with_scores(product_data, brand_category_scores)
+    # Fetch product data, stream the social data and match top 3 products
+    result = compute_final(TREND_FILE)
 
     # Print final structured JSON output
     print(result)
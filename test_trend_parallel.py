@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import trend_parallel
+
+
+def _write_ndjson(path, posts, broken_after=None):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, post in enumerate(posts):
+            f.write(json.dumps(post) + "\n")
+            if i == broken_after:
+                f.write("{broken\n")
+
+
+def _posts(n):
+    return [{"id": i, "caption": "Nike men runners", "likes": 1} for i in range(n)]
+
+
+def test_scores_ndjson_shards(tmp_path):
+    path = tmp_path / "posts.ndjson"
+    _write_ndjson(path, _posts(2000))
+
+    rows = trend_parallel.compute_trends_parallel([str(path)], ["Nike"], workers=1, shard_bytes=4096)
+
+    assert [(row["brand"], row["category"]) for row in rows] == [("Nike", "Men")]
+    assert rows[0]["trend_score"] == 2000 * trend_parallel.TREND_WEIGHTS["likes"]
+
+
+def test_scores_json_array_shards(tmp_path):
+    # Captions with brackets, commas and escaped quotes must not be mistaken for element boundaries
+    posts = [{"id": i, "caption": 'Nike men "runners" },{ \\', "likes": 1} for i in range(2000)]
+    path = tmp_path / "posts.json"
+    path.write_text(json.dumps(posts, indent=2), encoding="utf-8")
+
+    spans = list(trend_parallel.iter_array_shards(str(path), shard_bytes=4096, chunk_bytes=1000))
+    decoded = [post for start, end in spans for post in trend_parallel._iter_array_range(str(path), start, end)]
+    rows = trend_parallel.compute_trends_parallel([str(path)], ["Nike"], workers=1, shard_bytes=4096)
+
+    assert len(spans) > 1
+    assert decoded == posts
+    assert rows[0]["trend_score"] == 2000 * trend_parallel.TREND_WEIGHTS["likes"]
+
+
+def test_malformed_shard_raises_instead_of_hanging(tmp_path):
+    # Run in a subprocess so a regression shows up as a timeout, not a hung test session
+    path = tmp_path / "posts.ndjson"
+    _write_ndjson(path, _posts(22000), broken_after=11000)
+    script = textwrap.dedent(f"""
+        import trend_parallel
+        trend_parallel.compute_trends_parallel([{str(path)!r}], ["Nike"], workers=1, shard_bytes=4096)
+    """)
+
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60,
+                            cwd=os.path.dirname(os.path.abspath(trend_parallel.__file__)))
+
+    assert result.returncode != 0
+    assert f"Shard {path} bytes" in result.stderr
+    assert "malformed NDJSON line" in result.stderr
@@ -0,0 +1,114 @@
+import io
+import json
+import pickle
+import threading
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Per-process cache of loaded indexes: document_id -> {"vectorizer", "matrix", "chunks"}
+_indexes = {}
+_lock = threading.Lock()
+
+
+def init_tfidf_table(db_conn):
+    """Create the table holding one fitted TF-IDF index per document."""
+    db_conn.execute('''
+        CREATE TABLE IF NOT EXISTS tfidf_index (
+            document_id INTEGER PRIMARY KEY,
+            chunk_ids TEXT,
+            vectorizer BLOB,
+            matrix BLOB,
+            built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(document_id) REFERENCES documents(id)
+        )
+    ''')
+
+
+def build_tfidf_index(db_conn, document_id):
+    """Fit the TF-IDF vectorizer over a document's chunks and persist it with the float32 chunk matrix."""
+    init_tfidf_table(db_conn)
+    rows = db_conn.execute(
+        "SELECT id, chunk FROM chunks WHERE document_id = ? ORDER BY id", (document_id,)
+    ).fetchall()
+    if not rows:
+        return
+
+    chunk_ids = [row[0] for row in rows]
+    vectorizer = TfidfVectorizer(dtype=np.float32)
+    matrix = vectorizer.fit_transform([row[1] for row in rows]).tocsr()
+
+    buffer = io.BytesIO()
+    sparse.save_npz(buffer, matrix, compressed=False)
+
+    db_conn.execute(
+        "INSERT OR REPLACE INTO tfidf_index (document_id, chunk_ids, vectorizer, matrix) VALUES (?, ?, ?, ?)",
+        (document_id, json.dumps(chunk_ids), pickle.dumps(vectorizer), buffer.getvalue())
+    )
+    db_conn.commit()
+
+    with _lock:
+        _indexes.pop(document_id, None)
+    print(f"✅ TF-IDF index built for document {document_id}: {matrix.shape[0]} chunks, {matrix.shape[1]} terms.")
+
+
+def load_tfidf_index(db_conn, document_id):
+    """Return the document's index, loading it once per process and building it if missing."""
+    with _lock:
+        index = _indexes.get(document_id)
+    if index is not None:
+        return index
+
+    init_tfidf_table(db_conn)
+    row = db_conn.execute(
+        "SELECT chunk_ids, vectorizer, matrix FROM tfidf_index WHERE document_id = ?", (document_id,)
+    ).fetchone()
+    if row is None:
+        build_tfidf_index(db_conn, document_id)
+        row = db_conn.execute(
+            "SELECT chunk_ids, vectorizer, matrix FROM tfidf_index WHERE document_id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+    chunk_ids = json.loads(row[0])
+    texts = dict(db_conn.execute("SELECT id, chunk FROM chunks WHERE document_id = ?", (document_id,)).fetchall())
+    index = {
+        "vectorizer": pickle.loads(row[1]),
+        "matrix": sparse.load_npz(io.BytesIO(row[2])),
+        "chunks": [texts.get(chunk_id, "") for chunk_id in chunk_ids]
+    }
+
+    with _lock:
+        _indexes[document_id] = index
+    return index
+
+
+def query_tfidf_index(db_conn, document_id, query_text, top_k=5):
+    """Rank a document's chunks against the query using its prebuilt TF-IDF index.
+
+    Only the query is transformed; rows are L2-normalized so the sparse dot
+    product equals cosine similarity, and top-k uses a partial selection.
+    """
+    index = load_tfidf_index(db_conn, document_id)
+    if index is None:
+        return []
+
+    query_vector = index["vectorizer"].transform([query_text])
+    scores = (index["matrix"] @ query_vector.T).toarray().ravel()
+
+    k = min(top_k, scores.shape[0])
+    if k == 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [index["chunks"][i] for i in top]
+
+
+def invalidate_tfidf_index(document_id=None):
+    """Forget loaded indexes so they are re-read from the database."""
+    with _lock:
+        if document_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(document_id, None)
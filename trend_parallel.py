@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import threading
+import time
+from multiprocessing import Pool
+import numpy as np
+from brand_matcher import TREND_CATEGORIES, get_matcher, match_post
+from trend_scoring import METRIC_FIELDS, TREND_WEIGHTS, posts_to_columns
+from trend_stream import ranked_scores
+
+SHARD_BYTES = 32 << 20      # byte range of a dump handled by one task
+SCAN_CHUNK_BYTES = 4 << 20  # bytes of a JSON array scanned for element boundaries at a time
+
+METRICS = tuple(METRIC_FIELDS)
+
+SLOT_POLL_SECONDS = 0.1     # how often a producer waiting for a free slot checks for an aborted run
+
+# Worker-process state, set once by the pool initializer
+_matcher = None
+
+
+def _init_worker(brands, categories):
+    global _matcher
+    _matcher = get_matcher(brands, categories)
+
+
+def is_ndjson(file_path):
+    """True unless the dump's first non-blank character opens a JSON array."""
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                return True
+            stripped = chunk.lstrip(b"\xef\xbb\xbf \t\r\n")
+            if stripped:
+                return not stripped.startswith(b"[")
+
+
+def _iter_byte_range(file_path, start, end):
+    """Yield the NDJSON posts whose line starts inside [start, end)."""
+    with open(file_path, "rb") as f:
+        if start:
+            # Finish the line that straddles the boundary; it belongs to the previous shard
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"malformed NDJSON line at byte {offset}: {e.msg}") from None
+
+
+def iter_array_shards(file_path, shard_bytes=SHARD_BYTES, chunk_bytes=SCAN_CHUNK_BYTES):
+    """Yield (start, end) byte ranges of a JSON array that each hold whole elements.
+
+    The array is scanned without decoding it: escape sequences are blanked
+    out (same length, so offsets hold), then NumPy tracks string state and
+    bracket depth over just the structural bytes of each chunk. A range is
+    closed at the first top-level comma at least `shard_bytes` past its start,
+    so workers can decode their range on their own.
+    """
+    in_string, depth = 0, 0
+    start = None
+    offset = 0
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                raise ValueError(f"Unterminated JSON array in {file_path}")
+            # Never split a run of backslashes from the byte it escapes
+            while chunk.endswith(b"\\"):
+                more = f.read(1)
+                if not more:
+                    break
+                chunk += more
+            cleaned = chunk.replace(b"\\\\", b"  ").replace(b'\\"', b"  ")
+
+            a = np.frombuffer(cleaned, dtype=np.uint8)
+            # Only quotes, brackets and commas can change string state or depth
+            index = np.flatnonzero((a == 34) | (a == 44) | (a == 91) | (a == 93) | (a == 123) | (a == 125))
+            token = a[index]
+            quotes = np.cumsum(token == 34, dtype=np.int64) + in_string
+            outside = quotes % 2 == 0
+            opens = outside & ((token == 91) | (token == 123))
+            closes = outside & ((token == 93) | (token == 125))
+            levels = depth + np.cumsum(opens, dtype=np.int64) - np.cumsum(closes, dtype=np.int64)
+
+            if start is None:
+                first = np.flatnonzero(opens)
+                if len(first):
+                    start = offset + int(index[first[0]]) + 1
+            separators = index[outside & (token == 44) & (levels == 1)] + offset
+            ends = index[closes & (levels == 0)]
+            if len(ends):
+                separators = separators[separators < offset + ends[0]]
+
+            while start is not None:
+                i = np.searchsorted(separators, start + shard_bytes)
+                if i == len(separators):
+                    break
+                yield start, int(separators[i])
+                start = int(separators[i]) + 1
+
+            if len(ends):
+                yield start, offset + int(ends[0])
+                return
+
+            if len(token):
+                in_string, depth = int(quotes[-1] % 2), int(levels[-1])
+            offset += len(a)
+
+
+def _iter_array_range(file_path, start, end):
+    """Yield the JSON-array elements in the byte range [start, end) found by iter_array_shards."""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    decoder = json.JSONDecoder()
+    pos = 0
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(text):
+            return
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            offset = start + len(text[:e.pos].encode("utf-8"))
+            raise ValueError(f"malformed JSON array element at byte {offset}: {e.msg}") from None
+        yield item
+
+
+def aggregate_posts(posts, matcher):
+    """Map step: per-(brand, category) [posts, likes, shares, comments, views] sums for a shard."""
+    keys, matched = [], []
+    total = 0
+    for item in posts:
+        total += 1
+        text = item.get("caption") or item.get("message") or item.get("text", "")
+        brand, category = match_post(matcher, text)
+        if brand and category:
+            keys.append((brand, category))
+            matched.append(item)
+
+    partial = {}
+    if matched:
+        codes = {}
+        group = np.fromiter((codes.setdefault(key, len(codes)) for key in keys), dtype=np.int64, count=len(keys))
+        columns = posts_to_columns(matched)
+        sums = [np.bincount(group, minlength=len(codes))] + [
+            np.bincount(group, weights=columns[metric], minlength=len(codes)) for metric in METRICS
+        ]
+        for key, code in codes.items():
+            partial[key] = [int(column[code]) for column in sums]
+    return total, partial
+
+
+def _run_task(task):
+    kind, (path, start, end) = task
+    try:
+        posts = _iter_byte_range(path, start, end) if kind == "range" else _iter_array_range(path, start, end)
+        return aggregate_posts(posts, _matcher)
+    except Exception as e:
+        # Re-raised as a plain ValueError so it pickles back to the parent with the shard named
+        raise ValueError(f"Shard {path} bytes {start}-{end} failed: {e}") from None
+
+
+def merge_partials(totals, partial):
+    """Reduce step: add one shard's sums into the running totals."""
+    for key, sums in partial.items():
+        current = totals.get(key)
+        if current is None:
+            totals[key] = list(sums)
+        else:
+            for i, value in enumerate(sums):
+                current[i] += value
+    return totals
+
+
+def _acquire_slot(slots, abort):
+    """Wait for a free slot; False once the run has been aborted."""
+    while not slots.acquire(timeout=SLOT_POLL_SECONDS):
+        if abort.is_set():
+            return False
+    return not abort.is_set()
+
+
+def plan_tasks(paths, slots, abort, shard_bytes=SHARD_BYTES):
+    """Yield map tasks: byte ranges of NDJSON lines or of JSON-array elements.
+
+    NDJSON files are cut at fixed offsets and workers realign to line starts;
+    JSON arrays are cut at element boundaries found by iter_array_shards as it
+    goes, so workers start while the scan is still running. `slots` bounds how
+    many tasks are in flight. The generator stops as soon as `abort` is set,
+    so the pool's task-handler thread (which runs it) never blocks a
+    terminate() after a failed shard.
+    """
+    for path in paths:
+        if is_ndjson(path):
+            size = os.path.getsize(path)
+            shards = (("range", (path, start, min(start + shard_bytes, size))) for start in range(0, size, shard_bytes))
+        else:
+            shards = (("array", (path, start, end)) for start, end in iter_array_shards(path, shard_bytes))
+        for task in shards:
+            if not _acquire_slot(slots, abort):
+                return
+            yield task
+
+
+def compute_trends_parallel(paths, brands, categories=TREND_CATEGORIES, workers=None, weights=TREND_WEIGHTS,
+                            shard_bytes=SHARD_BYTES):
+    """Map-reduce per-(brand, category) trend scores over several dumps on a process pool.
+
+    Input files are assumed to hold disjoint posts (e.g. one export per
+    platform or per day); overlapping exports should go through trend_store,
+    which deduplicates by post id. A shard that fails (e.g. a malformed NDJSON
+    line or array element) aborts the run with a ValueError naming the file
+    and byte range.
+    """
+    workers = workers or os.cpu_count()
+    slots = threading.BoundedSemaphore(workers * 2)
+    abort = threading.Event()
+    totals = {}
+    posts = tasks = 0
+    start = time.perf_counter()
+
+    with Pool(processes=workers, initializer=_init_worker, initargs=(tuple(brands), tuple(categories))) as pool:
+        try:
+            for count, partial in pool.imap_unordered(_run_task, plan_tasks(paths, slots, abort, shard_bytes)):
+                slots.release()
+                merge_partials(totals, partial)
+                posts += count
+                tasks += 1
+        except BaseException as e:
+            abort.set()
+            print(f"❌ Trend computation aborted: {e}")
+            raise
+
+    elapsed = time.perf_counter() - start
+    scores = {
+        key: sum(value * weights[metric] for metric, value in zip(METRICS, sums[1:]))
+        for key, sums in totals.items()
+    }
+    print(
+        f"✅ {posts:,} posts from {len(paths)} files in {tasks} shards on {workers} workers: "
+        f"{elapsed:.2f}s ({posts / elapsed if elapsed > 0 else 0:,.0f} posts/s)"
+    )
+    return ranked_scores(scores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute brand/category trend scores over several dumps in parallel.")
+    parser.add_argument("files", nargs="+", help="JSON-array or NDJSON social dumps")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--brands", help="Comma-separated brand list (default: brands from the store database)")
+    args = parser.parse_args()
+
+    if args.brands:
+        brands = [b.strip() for b in args.brands.split(",") if b.strip()]
+    else:
+        from step import fetch_brands
+        brands = fetch_brands()
+
+    for row in compute_trends_parallel(args.files, brands, workers=args.workers):
+        print(f"{row['brand']:<20} {row['category']:<8} {row['trend_score']:,.1f}")
@@ -0,0 +1,146 @@
+import random
+import time
+import numpy as np
+from brand_matcher import match_post
+
+# Weight of each engagement metric in a post's trend score.
+TREND_WEIGHTS = {"likes": 0.4, "shares": 0.3, "comments": 0.2, "views": 0.1}
+
+# Platform-specific field names for each metric, in order of preference
+# (a missing or zero value falls through to the next name).
+METRIC_FIELDS = {
+    "likes": ("like_count", "likes"),
+    "shares": ("shares",),
+    "comments": ("comments_count", "comments"),
+    "views": ("impressions", "views")
+}
+
+SCORING_BATCH_SIZE = 65536   # matched posts scored per vectorized batch
+
+
+def _field(posts, key, rows=None):
+    if rows is None:
+        return np.array([item.get(key) or 0 for item in posts], dtype=np.float64)
+    return np.array([posts[i].get(key) or 0 for i in rows], dtype=np.float64)
+
+
+def posts_to_columns(posts):
+    """Normalize the posts' engagement fields into one int64 NumPy column per metric.
+
+    Each field name is read in one pass over the batch; fallback names are
+    only looked up for the rows where the preferred ones were missing or zero.
+    """
+    columns = {}
+    for metric, fields in METRIC_FIELDS.items():
+        column = _field(posts, fields[0])
+        for field in fields[1:]:
+            missing = np.flatnonzero(column == 0).tolist()
+            if missing:
+                column[missing] = _field(posts, field, missing)
+        columns[metric] = column.astype(np.int64)
+    return columns
+
+
+def calculate_trend_score(likes, shares, comments, views, weights=TREND_WEIGHTS):
+    """Weighted trend score of a single post's engagement metrics."""
+    metrics = {"likes": likes, "shares": shares, "comments": comments, "views": views}
+    return sum(metrics[metric] * weight for metric, weight in weights.items())
+
+
+def score_columns(columns, weights=TREND_WEIGHTS):
+    """Vectorized weighted sum of the metric columns: one float64 trend score per post."""
+    scores = np.zeros(len(next(iter(columns.values()))), dtype=np.float64)
+    for metric, weight in weights.items():
+        scores += columns[metric] * weight
+    return scores
+
+
+def iter_scored_batches(posts, matcher, weights=TREND_WEIGHTS, batch_size=SCORING_BATCH_SIZE):
+    """Match posts to (brand, category) and score them in vectorized batches.
+
+    Yields (keys, columns, scores) per batch, where keys[i] is the
+    (brand, category) of the i-th matched post. Posts without both a brand and
+    a category are skipped.
+    """
+    keys, batch = [], []
+    for item in posts:
+        text = item.get("caption") or item.get("message") or item.get("text", "")
+        brand, category = match_post(matcher, text)
+        if brand and category:
+            keys.append((brand, category))
+            batch.append(item)
+            if len(batch) >= batch_size:
+                columns = posts_to_columns(batch)
+                yield keys, columns, score_columns(columns, weights)
+                keys, batch = [], []
+    if batch:
+        columns = posts_to_columns(batch)
+        yield keys, columns, score_columns(columns, weights)
+
+
+def add_grouped_scores(totals, keys, scores):
+    """Add one batch's scores into running {(brand, category): trend_score} totals with a bincount."""
+    codes = {}
+    group = np.fromiter((codes.setdefault(key, len(codes)) for key in keys), dtype=np.int64, count=len(keys))
+    sums = np.bincount(group, weights=scores, minlength=len(codes))
+    for key, code in codes.items():
+        totals[key] = totals.get(key, 0) + float(sums[code])
+    return totals
+
+
+def aggregate_trend_scores(posts, matcher, weights=TREND_WEIGHTS):
+    """Sum trend scores per (brand, category) over a stream of posts."""
+    totals = {}
+    for keys, _, scores in iter_scored_batches(posts, matcher, weights):
+        add_grouped_scores(totals, keys, scores)
+    return totals
+
+
+# ---- BENCHMARK ----
+def _loop_scores(posts, keys):
+    """Per-post reference mirroring the previous scoring loop."""
+    totals = {}
+    for item, key in zip(posts, keys):
+        likes = int(item.get("like_count") or item.get("likes", 0))
+        shares = int(item.get("shares", 0))
+        comments = int(item.get("comments_count") or item.get("comments", 0))
+        views = int(item.get("impressions") or item.get("views", 0))
+        score = (likes * 0.4) + (shares * 0.3) + (comments * 0.2) + (views * 0.1)
+        totals[key] = totals.get(key, 0) + score
+    return totals
+
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+    n = 1_000_000
+    posts = []
+    for i in range(n):
+        if rng.random() < 0.5:
+            posts.append({"like_count": rng.randint(0, 5000), "comments_count": rng.randint(0, 500),
+                          "impressions": rng.randint(0, 100000), "shares": rng.randint(0, 400)})
+        else:
+            posts.append({"likes": rng.randint(0, 5000), "comments": rng.randint(0, 500),
+                          "views": rng.randint(0, 100000), "shares": rng.randint(0, 400)})
+    keys = [(rng.choice(["Nike", "Adidas", "Puma", "SK", "ARF"]), rng.choice(["Men", "Women", "Kids"])) for _ in range(n)]
+
+    start = time.perf_counter()
+    expected = _loop_scores(posts, keys)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = posts_to_columns(posts)
+    columns_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    totals = add_grouped_scores({}, keys, score_columns(columns))
+    scoring_seconds = time.perf_counter() - start
+
+    assert expected.keys() == totals.keys()
+    assert all(abs(expected[k] - totals[k]) <= 1e-9 * abs(expected[k]) for k in expected)
+    vector_seconds = columns_seconds + scoring_seconds
+    print(
+        f"📦 {n:,} posts, {len(totals)} brand/category groups\n"
+        f"   per-post loop {loop_seconds:.2f}s | vectorized {vector_seconds:.2f}s "
+        f"(columns {columns_seconds:.2f}s, scoring + grouping {scoring_seconds:.3f}s) | "
+        f"{loop_seconds / vector_seconds:.1f}x"
+    )
@@ -0,0 +1,278 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from brand_matcher import TREND_CATEGORIES, get_matcher, match_post
+from trend_scoring import METRIC_FIELDS, TREND_WEIGHTS, posts_to_columns, score_columns
+from trend_stream import iter_posts, ranked_scores
+
+TREND_STORE_DB = 'trend_store.db'
+INGEST_BATCH_SIZE = 5000
+
+# Post fields that may carry the publication time; posts without one are
+# attributed to the day they were ingested.
+TIMESTAMP_FIELDS = ("created_time", "created_at", "timestamp", "date")
+
+METRICS = tuple(METRIC_FIELDS)
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(TREND_STORE_DB, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode = WAL")
+        # Every ingested post, keyed by "<platform>:<post id>". Posts that matched
+        # no brand/category keep their text and metrics so they can be re-matched
+        # (and counted) once the brand list changes.
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS trend_posts (
+                id TEXT PRIMARY KEY,
+                day TEXT,
+                ingested_at REAL,
+                platform TEXT,
+                matched INTEGER,
+                text TEXT,
+                likes INTEGER,
+                shares INTEGER,
+                comments INTEGER,
+                views INTEGER
+            )
+        ''')
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_trend_posts_matched ON trend_posts(matched)")
+        _conn.execute("CREATE TABLE IF NOT EXISTS trend_meta (key TEXT PRIMARY KEY, value TEXT)")
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS trend_rollups (
+                brand TEXT,
+                category TEXT,
+                platform TEXT,
+                day TEXT,
+                posts INTEGER,
+                likes INTEGER,
+                shares INTEGER,
+                comments INTEGER,
+                views INTEGER,
+                PRIMARY KEY (brand, category, platform, day)
+            )
+        ''')
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_trend_rollups_day ON trend_rollups(day)")
+        _conn.commit()
+    return _conn
+
+
+def post_platform(item):
+    return item.get("platform") or "unknown"
+
+
+def post_text(item):
+    return item.get("caption") or item.get("message") or item.get("text", "")
+
+
+def post_id(item):
+    """The post's own id (or a content hash when exported without one), qualified by platform."""
+    if item.get("id") is not None:
+        return f"{post_platform(item)}:{item['id']}"
+    return f"{post_platform(item)}:sha256:" + hashlib.sha256(json.dumps(item, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def vocabulary_digest(brands, categories):
+    return hashlib.sha256(json.dumps([list(brands), list(categories)]).encode("utf-8")).hexdigest()
+
+
+def post_day(item, default_day):
+    """ISO day the post was published, falling back to `default_day`."""
+    for field in TIMESTAMP_FIELDS:
+        value = item.get(field)
+        try:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return datetime.fromtimestamp(value, tz=timezone.utc).date().isoformat()
+            if isinstance(value, str) and value:
+                return date.fromisoformat(value[:10]).isoformat()
+        except (ValueError, OverflowError, OSError):
+            continue
+    return default_day
+
+
+def _unseen(conn, batch):
+    """Drop posts already in the store (or repeated within the batch)."""
+    ids = [post_id(item) for item in batch]
+    seen = set()
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        placeholders = ",".join("?" * len(chunk))
+        seen.update(row[0] for row in conn.execute(f"SELECT id FROM trend_posts WHERE id IN ({placeholders})", chunk))
+
+    fresh = []
+    for item, item_id in zip(batch, ids):
+        if item_id not in seen:
+            seen.add(item_id)
+            fresh.append((item_id, item))
+    return fresh
+
+
+def _add_rollup(rollups, key, metrics):
+    totals = rollups.setdefault(key, [0] * (len(METRICS) + 1))
+    totals[0] += 1
+    for i, value in enumerate(metrics, 1):
+        totals[i] += value
+
+
+def _write_rollups(conn, rollups):
+    conn.executemany('''
+            INSERT INTO trend_rollups (brand, category, platform, day, posts, likes, shares, comments, views)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (brand, category, platform, day) DO UPDATE SET
+                posts = posts + excluded.posts,
+                likes = likes + excluded.likes,
+                shares = shares + excluded.shares,
+                comments = comments + excluded.comments,
+                views = views + excluded.views
+    ''', (key + tuple(totals) for key, totals in rollups.items()))
+
+
+def _ingest_batch(conn, batch, matcher, default_day, now):
+    fresh = _unseen(conn, batch)
+    if not fresh:
+        return 0, 0
+
+    columns = posts_to_columns([item for _, item in fresh])
+    metric_rows = zip(*(columns[metric].tolist() for metric in METRICS))
+    rollups, post_rows = {}, []
+    for (item_id, item), metrics in zip(fresh, metric_rows):
+        day, platform, text = post_day(item, default_day), post_platform(item), post_text(item)
+        brand, category = match_post(matcher, text)
+        if brand and category:
+            _add_rollup(rollups, (brand, category, platform, day), metrics)
+            post_rows.append((item_id, day, now, platform, 1, None, None, None, None, None))
+        else:
+            post_rows.append((item_id, day, now, platform, 0, text) + tuple(metrics))
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO trend_posts (id, day, ingested_at, platform, matched, text, likes, shares, comments, views) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            post_rows
+        )
+        _write_rollups(conn, rollups)
+    return len(fresh), sum(1 for row in post_rows if row[4])
+
+
+def _rematch_unmatched(conn, matcher):
+    """Match the stored unmatched posts against the current vocabulary and count the new hits."""
+    rows = conn.execute(
+        "SELECT id, day, platform, text, likes, shares, comments, views FROM trend_posts WHERE matched = 0"
+    ).fetchall()
+    rollups, hits = {}, []
+    for item_id, day, platform, text, *metrics in rows:
+        brand, category = match_post(matcher, text)
+        if brand and category:
+            _add_rollup(rollups, (brand, category, platform, day), [value or 0 for value in metrics])
+            hits.append((item_id,))
+
+    if hits:
+        with conn:
+            conn.executemany(
+                "UPDATE trend_posts SET matched = 1, text = NULL, likes = NULL, shares = NULL, comments = NULL, views = NULL "
+                "WHERE id = ?",
+                hits
+            )
+            _write_rollups(conn, rollups)
+        print(f"♻️ Trend store: {len(hits)} of {len(rows)} earlier unmatched posts now match the brand list")
+    return len(hits)
+
+
+def ingest_trend_file(file_path, brands, categories=TREND_CATEGORIES, day=None):
+    """Add the posts of a dump that are not in the store yet to the per-day rollups.
+
+    Posts are deduplicated by platform-qualified id, so re-ingesting a dump (or
+    a dump that overlaps an earlier one) only processes the new posts. Posts
+    that match no brand/category are kept aside and re-matched whenever the
+    brand list changes. Raises ValueError for an empty brand list (e.g. the
+    catalog could not be read), since nothing could be matched.
+    """
+    if not any(brands):
+        raise ValueError("Refusing to ingest trend posts with an empty brand list")
+
+    default_day = day or date.today().isoformat()
+    matcher = get_matcher(tuple(brands), tuple(categories))
+    digest = vocabulary_digest(brands, categories)
+    now = time.time()
+    start = time.perf_counter()
+    seen = new = matched = rematched = 0
+
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT value FROM trend_meta WHERE key = 'vocabulary'").fetchone()
+        if row is None or row[0] != digest:
+            rematched = _rematch_unmatched(conn, matcher)
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO trend_meta (key, value) VALUES ('vocabulary', ?)", (digest,))
+
+        batch = []
+        for item in iter_posts(file_path):
+            batch.append(item)
+            if len(batch) >= INGEST_BATCH_SIZE:
+                added, hits = _ingest_batch(conn, batch, matcher, default_day, now)
+                seen, new, matched = seen + len(batch), new + added, matched + hits
+                batch = []
+        if batch:
+            added, hits = _ingest_batch(conn, batch, matcher, default_day, now)
+            seen, new, matched = seen + len(batch), new + added, matched + hits
+
+    print(f"✅ Trend store: {new} new of {seen} posts ({matched} matched) ingested in {time.perf_counter() - start:.2f}s")
+    return {"posts": seen, "new": new, "matched": matched, "rematched": rematched}
+
+
+def scores_over_last_days(days, today=None, platform=None, weights=TREND_WEIGHTS):
+    """Per-(brand, category) trend scores over the last `days` days, highest first, read from the rollups.
+
+    Rollups keep raw metric sums, so scores for any weights are computed at
+    query time without touching individual posts.
+    """
+    today = date.fromisoformat(today) if today else date.today()
+    since = (today - timedelta(days=days - 1)).isoformat()
+    query = (
+        "SELECT brand, category, SUM(likes), SUM(shares), SUM(comments), SUM(views) "
+        "FROM trend_rollups WHERE day >= ? AND day <= ?"
+    )
+    params = [since, today.isoformat()]
+    if platform:
+        query += " AND platform = ?"
+        params.append(platform)
+    query += " GROUP BY brand, category"
+
+    with _lock:
+        rows = _get_conn().execute(query, params).fetchall()
+
+    scores = {}
+    for brand, category, *sums in rows:
+        scores[(brand, category)] = sum(value * weights[metric] for metric, value in zip(METRICS, sums))
+    return ranked_scores(scores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental social-trend store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest", help="Ingest the new posts of a JSON/NDJSON dump")
+    ingest_parser.add_argument("file", help="Dump to ingest")
+    ingest_parser.add_argument("--day", help="Day (YYYY-MM-DD) for posts without a timestamp (default: today)")
+    top_parser = subparsers.add_parser("top", help="Show brand/category scores over the last N days")
+    top_parser.add_argument("--days", type=int, default=7)
+    top_parser.add_argument("--platform")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        from step import fetch_brands
+        try:
+            ingest_trend_file(args.file, fetch_brands(), day=args.day)
+        except ValueError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+    else:
+        for row in scores_over_last_days(args.days, platform=args.platform):
+            print(f"{row['brand']:<20} {row['category']:<8} {row['trend_score']:,.1f}")
@@ -0,0 +1,116 @@
+import json
+import sys
+import time
+import tracemalloc
+
+READ_CHUNK_SIZE = 1 << 20   # characters read from the dump at a time
+MAX_ELEMENT_CHUNKS = 16     # an element still undecodable after this many chunks is rejected
+
+# A decode error this close to the end of the buffer means the element was cut off
+TRUNCATION_SLACK = 16
+
+
+def iter_posts(file_path, chunk_size=READ_CHUNK_SIZE):
+    """Yield posts one at a time from a JSON-array or NDJSON dump, in constant memory.
+
+    The format is detected from the first non-blank character: "[" starts a
+    JSON array, anything else is read as one JSON object per line.
+    """
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        raw = f.read(chunk_size)
+        buffer = raw.lstrip()
+        if buffer.startswith("["):
+            yield from _iter_json_array(f, buffer[1:], chunk_size, len(raw) - len(buffer) + 1, file_path)
+        else:
+            f.seek(0)
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Invalid JSON on line {line_number} of {file_path}: {e}") from e
+
+
+def _truncated(error, buffer):
+    """True if the decode error comes from the buffer ending mid-element rather than bad JSON."""
+    return error.msg.startswith("Unterminated string") or error.pos >= len(buffer) - TRUNCATION_SLACK
+
+
+def _iter_json_array(f, buffer, chunk_size, base, file_path):
+    """Decode the elements of a JSON array incrementally from a buffered file.
+
+    `base` is the character offset of buffer[0] in the file, used to locate
+    malformed elements. More input is only read when an element runs into the
+    end of the buffer, so a bad element fails fast instead of pulling the rest
+    of the dump into memory.
+    """
+    decoder = json.JSONDecoder()
+    pos = 0
+    while True:
+        # Skip separators between elements
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+
+        if pos == len(buffer):
+            more = f.read(chunk_size)
+            if not more:
+                raise ValueError(f"Unterminated JSON array in {file_path}")
+            base += len(buffer)
+            buffer, pos = more, 0
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if not _truncated(e, buffer):
+                more = ""
+            elif len(buffer) - pos >= MAX_ELEMENT_CHUNKS * chunk_size:
+                raise ValueError(
+                    f"JSON array element at character {base + pos} of {file_path} "
+                    f"exceeds {MAX_ELEMENT_CHUNKS * chunk_size} characters"
+                )
+            else:
+                more = f.read(chunk_size)
+            if not more:
+                raise ValueError(
+                    f"Invalid JSON array element at character {base + pos} of {file_path}: "
+                    f"{e.msg} (character {base + e.pos})"
+                ) from None
+            # The element is cut off by the end of the buffer; read more and retry
+            base += pos
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        yield item
+        pos = end
+        if pos > chunk_size:
+            base += pos
+            buffer, pos = buffer[pos:], 0
+
+
+def ranked_scores(scores):
+    """Turn running {(brand, category): trend_score} sums into records sorted by score, highest first."""
+    return [
+        {"brand": brand, "category": category, "trend_score": trend_score}
+        for (brand, category), trend_score in sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "final.json"
+
+    for label, load in (
+        ("json.load", lambda: json.load(open(file_path, "r", encoding="utf-8"))),
+        ("iter_posts", lambda: iter_posts(file_path))
+    ):
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = sum(1 for _ in load())
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"📄 {label:10} {count:,} posts in {elapsed:.3f}s | peak memory {peak / 1e6:.1f} MB")
@@ -0,0 +1,260 @@
+import os
+import threading
+import time
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# "ollama" embeds with Ollama's embedding endpoint and falls back to the local
+# hashing embedder when Ollama is unreachable; "hash" always embeds locally.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "ollama").lower()
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "nomic-embed-text")
+HASH_DIMENSIONS = 1024
+VECTOR_DTYPE = os.environ.get("VECTOR_DTYPE", "int8").lower()   # "int8" or "float32"
+
+IVF_MIN_VECTORS = 4096    # below this an exact scan is faster than probing partitions
+IVF_NPROBE = 8            # partitions scanned per query
+IVF_ITERATIONS = 8
+
+EMBED_BATCH_SIZE = 64
+
+# Per-process cache of loaded indexes: document_id -> index dict
+_indexes = {}
+_embedders = {}
+_lock = threading.Lock()
+
+
+def init_vector_table(db_conn):
+    """Create the table holding one embedding per chunk."""
+    db_conn.execute('''
+        CREATE TABLE IF NOT EXISTS chunk_vectors (
+            chunk_id INTEGER PRIMARY KEY,
+            document_id INTEGER,
+            embedder TEXT,
+            dtype TEXT,
+            scale REAL,
+            vector BLOB,
+            FOREIGN KEY(chunk_id) REFERENCES chunks(id)
+        )
+    ''')
+    db_conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_vectors_document_id ON chunk_vectors(document_id)")
+
+
+# ---- EMBEDDERS ----
+def hash_embed(texts):
+    """Embed texts locally with signed feature hashing of word unigrams and bigrams."""
+    vectorizer = HashingVectorizer(n_features=HASH_DIMENSIONS, ngram_range=(1, 2), alternate_sign=True, norm="l2")
+    return vectorizer.transform(texts).toarray().astype(np.float32)
+
+
+def _ollama_embedder():
+    with _lock:
+        embedder = _embedders.get(EMBEDDING_MODEL)
+        if embedder is None:
+            from langchain_ollama import OllamaEmbeddings
+            embedder = _embedders[EMBEDDING_MODEL] = OllamaEmbeddings(model=EMBEDDING_MODEL)
+        return embedder
+
+
+def embed_texts(texts, embedder_name):
+    """Embed texts with the named embedder ("hash" or "ollama:<model>") as L2-normalized float32 rows."""
+    if embedder_name == "hash":
+        return hash_embed(texts)
+
+    embedder = _ollama_embedder()
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        vectors.extend(embedder.embed_documents(texts[start:start + EMBED_BATCH_SIZE]))
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _embed_chunks(texts):
+    """Embed chunks with the configured backend, falling back to hashing when Ollama is unavailable."""
+    if EMBEDDING_BACKEND == "ollama":
+        embedder_name = f"ollama:{EMBEDDING_MODEL}"
+        try:
+            return embedder_name, embed_texts(texts, embedder_name)
+        except Exception as e:
+            print(f"❌ Ollama embedding failed ({e}); using the local hashing embedder")
+    return "hash", embed_texts(texts, "hash")
+
+
+# ---- STORAGE ----
+def _quantize(vector):
+    """Encode a float32 vector as (dtype, scale, bytes); int8 uses a symmetric per-vector scale."""
+    if VECTOR_DTYPE != "int8":
+        return "float32", 1.0, vector.astype(np.float32).tobytes()
+    scale = float(np.abs(vector).max()) / 127 or 1.0
+    return "int8", scale, np.round(vector / scale).astype(np.int8).tobytes()
+
+
+def _dequantize(dtype, scale, blob):
+    if dtype == "int8":
+        return np.frombuffer(blob, dtype=np.int8).astype(np.float32) * scale
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def build_vector_index(db_conn, document_id):
+    """Embed a document's chunks and store one compact vector per chunk."""
+    init_vector_table(db_conn)
+    rows = db_conn.execute(
+        "SELECT id, chunk FROM chunks WHERE document_id = ? ORDER BY id", (document_id,)
+    ).fetchall()
+    if not rows:
+        return
+
+    start = time.perf_counter()
+    embedder_name, matrix = _embed_chunks([row[1] for row in rows])
+
+    with db_conn:
+        db_conn.execute("DELETE FROM chunk_vectors WHERE document_id = ?", (document_id,))
+        db_conn.executemany(
+            "INSERT INTO chunk_vectors (chunk_id, document_id, embedder, dtype, scale, vector) VALUES (?, ?, ?, ?, ?, ?)",
+            ((row[0], document_id, embedder_name) + _quantize(vector) for row, vector in zip(rows, matrix))
+        )
+
+    with _lock:
+        _indexes.pop(document_id, None)
+    print(
+        f"✅ Vector index built for document {document_id}: {len(rows)} chunks, "
+        f"{matrix.shape[1]} dims ({embedder_name}, {VECTOR_DTYPE}) in {time.perf_counter() - start:.2f}s."
+    )
+
+
+# ---- SEARCH ----
+def build_ivf(matrix, n_lists=None, iterations=IVF_ITERATIONS, seed=0):
+    """Partition unit vectors with spherical k-means for coarse (IVF) search.
+
+    Returns the centroids, the vector ids sorted by partition and the offsets
+    of each partition in that order, or None when the matrix is too small.
+    """
+    n = matrix.shape[0]
+    if n < IVF_MIN_VECTORS:
+        return None
+    n_lists = n_lists or int(np.sqrt(n))
+
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(n, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, matrix)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        centroids = np.where(empty[:, None], centroids, sums / np.maximum(norms, 1e-12))
+
+    assignment = np.argmax(matrix @ centroids.T, axis=1)
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+    return {"centroids": centroids, "order": order, "offsets": offsets}
+
+
+def search_vectors(matrix, query_vector, top_k, ivf=None, nprobe=IVF_NPROBE):
+    """Return the row ids of the top-k rows by inner product, probing IVF partitions when available."""
+    if ivf is None:
+        candidates = None
+        scores = matrix @ query_vector
+    else:
+        lists = np.argpartition(-(ivf["centroids"] @ query_vector), min(nprobe, len(ivf["centroids"])) - 1)[:nprobe]
+        offsets, order = ivf["offsets"], ivf["order"]
+        candidates = np.concatenate([order[offsets[i]:offsets[i + 1]] for i in lists])
+        scores = matrix[candidates] @ query_vector
+
+    k = min(top_k, scores.shape[0])
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top if candidates is None else candidates[top]
+
+
+def load_vector_index(db_conn, document_id):
+    """Return the document's in-memory vector matrix, loading it once per process and building it if missing."""
+    with _lock:
+        index = _indexes.get(document_id)
+    if index is not None:
+        return index
+
+    init_vector_table(db_conn)
+    query = '''
+        SELECT chunk_vectors.embedder, chunk_vectors.dtype, chunk_vectors.scale, chunk_vectors.vector, chunks.chunk
+        FROM chunk_vectors JOIN chunks ON chunks.id = chunk_vectors.chunk_id
+        WHERE chunk_vectors.document_id = ? ORDER BY chunk_vectors.chunk_id
+    '''
+    rows = db_conn.execute(query, (document_id,)).fetchall()
+    if not rows:
+        build_vector_index(db_conn, document_id)
+        rows = db_conn.execute(query, (document_id,)).fetchall()
+        if not rows:
+            return None
+
+    matrix = np.vstack([_dequantize(row[1], row[2], row[3]) for row in rows])
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    index = {
+        "embedder": rows[0][0],
+        "matrix": matrix,
+        "chunks": [row[4] for row in rows],
+        "ivf": build_ivf(matrix)
+    }
+
+    with _lock:
+        _indexes[document_id] = index
+    return index
+
+
+def query_vector_index(db_conn, document_id, query_text, top_k=5):
+    """Rank a document's chunks by cosine similarity between the query and chunk embeddings."""
+    index = load_vector_index(db_conn, document_id)
+    if index is None:
+        return []
+
+    try:
+        query_vector = embed_texts([query_text], index["embedder"])[0]
+    except Exception as e:
+        print(f"❌ Could not embed query with {index['embedder']}: {e}")
+        return []
+    return [index["chunks"][i] for i in search_vectors(index["matrix"], query_vector, top_k, index["ivf"])]
+
+
+def invalidate_vector_index(document_id=None):
+    """Forget loaded vector indexes so they are re-read from the database."""
+    with _lock:
+        if document_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(document_id, None)
+
+
+# ---- BENCHMARK ----
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+    dims, queries, top_k = 256, 100, 10
+    for n in (10_000, 100_000):
+        # Clustered synthetic data, as real chunk embeddings are
+        centers = rng.standard_normal((256, dims)).astype(np.float32)
+        matrix = centers[rng.integers(0, 256, n)] + 0.5 * rng.standard_normal((n, dims)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        query_vectors = matrix[rng.choice(n, queries, replace=False)] + 0.1 * rng.standard_normal((queries, dims)).astype(np.float32)
+
+        start = time.perf_counter()
+        ivf = build_ivf(matrix)
+        build_seconds = time.perf_counter() - start
+
+        exact_seconds = ivf_seconds = 0.0
+        recall = 0
+        for q in query_vectors:
+            start = time.perf_counter()
+            expected = search_vectors(matrix, q, top_k)
+            exact_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            result = search_vectors(matrix, q, top_k, ivf)
+            ivf_seconds += time.perf_counter() - start
+            recall += len(set(expected) & set(result))
+
+        print(
+            f"📦 {n:,} vectors x {dims} dims — IVF with {len(ivf['centroids'])} lists built in {build_seconds:.2f}s\n"
+            f"   exact {exact_seconds / queries * 1000:.2f} ms/query | "
+            f"IVF (nprobe {IVF_NPROBE}) {ivf_seconds / queries * 1000:.2f} ms/query | "
+            f"recall@{top_k} {recall / (queries * top_k):.3f}"
+        )